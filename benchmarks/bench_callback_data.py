@@ -0,0 +1,51 @@
+# benchmarks/bench_callback_data.py
+#
+# Типизированные callback_data: размер данных и стоимость разбора
+# по сравнению с прежним ручным split("_") и с CallbackData из aiogram
+# (pydantic). Корректность упаковки проверяет tests/test_callback_data.py.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_callback_data
+
+import timeit
+
+from aiogram.filters.callback_data import CallbackData as AiogramCallbackData
+
+from config import COUNTRY_CODES, REGIONS
+from keyboards.callback_data import RegionCallback, CountryCallback, ProfilePageCallback
+
+
+class AiogramRegion(AiogramCallbackData, prefix="r"):
+    region: int
+
+
+class AiogramProfilePage(AiogramCallbackData, prefix="pg"):
+    cursor: int
+    older: bool
+
+
+def print_sizes() -> None:
+    """Размер callback_data страны с самым длинным названием: прежний формат и новый"""
+    longest = max(COUNTRY_CODES, key=lambda name: len(name.encode("utf-8")))
+    legacy = f"country_{longest}"
+    compact = CountryCallback(country=COUNTRY_CODES[longest]).pack()
+    print(f"{legacy!r}: {len(legacy.encode('utf-8'))} байт -> {compact!r}: {len(compact)} байт")
+
+
+def main(number: int = 200000):
+    print_sizes()
+
+    cases = {
+        "регион, split('_')[1]": lambda: "region_middle_east".split("_")[1] in REGIONS,
+        "регион, RegionCallback": lambda: RegionCallback.unpack("1").key,
+        "регион, aiogram": lambda: AiogramRegion.unpack("r:1"),
+        "страница, split('_')[2]": lambda: int("profile_older_1520".split("_")[2]),
+        "страница, ProfilePage": lambda: ProfilePageCallback.unpack("1520:1"),
+        "страница, aiogram": lambda: AiogramProfilePage.unpack("pg:1520:1"),
+    }
+    for name, func in cases.items():
+        seconds = timeit.timeit(func, number=number) / number
+        print(f"{name:<26} {seconds * 1e6:>6.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_callback_router.py
+#
+# Маршрутизация callback-запросов: прежняя цепочка из шести роутеров
+# с фильтрами F.data против одной таблицы CallbackRouter. Обработчики
+# пустые, поэтому измеряется только путь обновления через Dispatcher.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_callback_router
+
+import asyncio
+import time
+from itertools import cycle
+from typing import List, Tuple
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Update, User
+
+from utils.callback_router import CallbackRouter
+
+# Маршруты в порядке прежних роутеров: (роутер, значение, префикс ли это)
+ROUTES: List[Tuple[str, str, bool]] = [
+    ("start", "back_to_main", False),
+    ("buying", "buy_esim", False),
+    ("buying", "r:", True),
+    ("buying", "c:", True),
+    ("buying", "p:", True),
+    ("buying", "confirm_purchase", False),
+    ("buying", "show_esim_details", False),
+    ("buying", "cancel_purchase", False),
+    ("profile", "profile", False),
+    ("profile", "pg:", True),
+    ("profile", "e:", True),
+    ("profile", "a:", True),
+    ("setup", "setup", False),
+    ("questions", "questions", False),
+    ("questions", "q:", True),
+    ("menu", "partner", False),
+    ("menu", "partner_referral", False),
+    ("menu", "partner_community", False),
+    ("menu", "share_referral", False),
+    ("menu", "fb:", True),
+    ("menu", "support", False),
+]
+
+CALLBACKS = [
+    "back_to_main",
+    "buy_esim",
+    "r:1",
+    "c:SA",
+    "p:12",
+    "profile",
+    "pg:1520:1",
+    "a:7",
+    "q:0",
+    "fb:1",
+    "support",
+]
+
+
+async def noop(callback: CallbackQuery) -> None:
+    return None
+
+
+def build_chain() -> Dispatcher:
+    """Прежняя схема: роутер на раздел, фильтр на обработчик"""
+    dp = Dispatcher(storage=MemoryStorage())
+    routers = {}
+    for name, data, is_prefix in ROUTES:
+        router = routers.get(name)
+        if router is None:
+            router = routers[name] = Router(name=name)
+            dp.include_router(router)
+        data_filter = F.data.startswith(data) if is_prefix else F.data == data
+        router.callback_query.register(noop, data_filter)
+    return dp
+
+
+def build_table() -> Dispatcher:
+    """Новая схема: одна таблица маршрутов"""
+    dp = Dispatcher(storage=MemoryStorage())
+    callbacks = CallbackRouter(name="callbacks")
+    for _, data, is_prefix in ROUTES:
+        (callbacks.prefix(data) if is_prefix else callbacks.exact(data))(noop)
+    dp.include_router(callbacks)
+    return dp
+
+
+def make_update(update_id: int, data: str) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=User(id=update_id % 1000 + 1, is_bot=False, first_name="User"),
+            chat_instance="bench",
+            data=data
+        )
+    )
+
+
+async def measure(dp: Dispatcher, bot: Bot, updates: List[Update]) -> float:
+    """Среднее время обработки одного обновления (в мкс)"""
+    for update in updates[:100]:
+        await dp.feed_update(bot, update)
+
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / len(updates) * 1e6
+
+
+async def main(count: int = 20000):
+    bot = Bot("42:BENCHMARK")
+    data = cycle(CALLBACKS)
+    updates = [make_update(i, next(data)) for i in range(count)]
+
+    chain = await measure(build_chain(), bot, updates)
+    table_dp = build_table()
+    table = await measure(table_dp, bot, updates)
+
+    print(f"маршрутов: {len(ROUTES)}, обновлений: {count}")
+    print(f"цепочка роутеров:  {chain:>7.1f} мкс/обновление")
+    print(f"CallbackRouter:    {table:>7.1f} мкс/обновление ({chain / table:.1f}x)")
+
+    callbacks = table_dp.sub_routers[0]
+    stats = callbacks.stats()
+    print(f"поиск маршрута:    {stats['lookup_avg_us']:>7.2f} мкс")
+    for key, route in sorted(stats["routes"].items()):
+        print(f"  {key:<20} {route['calls']:>6} вызовов, среднее {route['avg_ms'] * 1000:.1f} мкс")
+
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
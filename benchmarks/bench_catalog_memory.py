@@ -0,0 +1,23 @@
+# benchmarks/bench_catalog_memory.py
+#
+# Память каталога по всем странам: словари из ответа API
+# против колоночных PackageTable.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_catalog_memory
+
+from benchmarks.catalog_sample import make_catalog
+from utils.packages import memory_report
+
+
+def main(count_per_country: int = 60):
+    catalog = make_catalog(count_per_country)
+    report = memory_report(catalog)
+
+    print(f"стран: {len(catalog)}, тарифов: {report['packages']}")
+    print(f"словари API:   {report['raw_bytes'] / 1024:>10.1f} КБ")
+    print(f"PackageTable:  {report['table_bytes'] / 1024:>10.1f} КБ")
+    print(f"экономия:      {report['raw_bytes'] / report['table_bytes']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
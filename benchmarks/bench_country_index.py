@@ -0,0 +1,35 @@
+# benchmarks/bench_country_index.py
+#
+# Время поиска страны по введенному тексту: точное совпадение,
+# опечатка и название, которого нет в индексе.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_country_index
+
+import timeit
+
+from config import COUNTRY_ALIASES, COUNTRY_CODES
+from utils.country_index import CountryIndex
+
+QUERIES = {
+    "точное": "таиланд ",
+    "английское": "Thailand",
+    "ISO-код": "TH",
+    "опечатка": "францыя",
+    "начало": "новая зел",
+    "не найдено": "Атлантида",
+}
+
+
+def main(number: int = 10000):
+    build = timeit.timeit(lambda: CountryIndex(COUNTRY_CODES, COUNTRY_ALIASES), number=100) / 100
+    index = CountryIndex(COUNTRY_CODES, COUNTRY_ALIASES)
+    print(f"терминов: {len(index)}, построение: {build * 1000:.2f} мс")
+
+    for name, query in QUERIES.items():
+        seconds = timeit.timeit(lambda: index.suggest(query), number=number) / number
+        matches = ", ".join(f"{match.name} ({match.distance})" for match in index.suggest(query))
+        print(f"{name:<12} {query!r:<14} {seconds * 1e6:>7.1f} мкс  {matches or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# benchmarks/bench_json_codec.py
+#
+# Разбор большого ответа /package/list (глобальный каталог):
+# стандартный json против orjson (если установлен) и построение PackageTable
+# из разобранного списка. Разбор идет в event loop, поэтому время разбора -
+# это и время блокировки loop.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_json_codec
+
+import json
+import timeit
+
+from benchmarks.catalog_sample import make_catalog, make_response
+from utils import json_codec
+from utils.packages import PackageTable
+
+
+def make_body(count_per_country: int) -> bytes:
+    """Ответ /package/list со всеми тарифами всех стран"""
+    packages = [package for packages in make_catalog(count_per_country).values() for package in packages]
+    return json.dumps(make_response(packages)).encode("utf-8")
+
+
+def main(count_per_country: int = 60, number: int = 5):
+    body = make_body(count_per_country)
+    print(f"ответ: {len(body) / 1024:.0f} КБ, кодек: {json_codec.CODEC_NAME}")
+
+    variants = {"json.loads": json.loads, f"{json_codec.CODEC_NAME}.loads": json_codec.loads}
+    for name, parse in variants.items():
+        seconds = timeit.timeit(lambda: parse(body), number=number) / number
+        print(f"{name:<28} {seconds * 1000:>8.1f} мс")
+
+    # PackageTable.from_api читает только нужные поля, словари API сразу освобождаются
+    packages = json_codec.loads(body)["obj"]["packageList"]
+    seconds = timeit.timeit(lambda: PackageTable.from_api(packages), number=number) / number
+    print(f"{'PackageTable.from_api':<28} {seconds * 1000:>8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
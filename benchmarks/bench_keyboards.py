@@ -0,0 +1,32 @@
+# benchmarks/bench_keyboards.py
+#
+# Сравнение сборки статических клавиатур на каждый callback
+# с выдачей готовой разметки из реестра.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_keyboards
+
+import timeit
+
+import keyboards.inline as inline
+
+
+def main(number: int = 2000):
+    print(f"{'клавиатура':<34}{'сборка, мкс':>14}{'реестр, мкс':>14}{'ускорение':>12}")
+
+    total_build = total_cached = 0.0
+
+    for name in inline.STATIC_KEYBOARDS:
+        getter = getattr(inline, name)
+
+        build = timeit.timeit(getter.build, number=number) / number * 1e6
+        cached = timeit.timeit(getter, number=number) / number * 1e6
+        total_build += build
+        total_cached += cached
+
+        print(f"{name:<34}{build:>14.2f}{cached:>14.3f}{build / cached:>11.0f}x")
+
+    print(f"{'итого за все экраны':<34}{total_build:>14.2f}{total_cached:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
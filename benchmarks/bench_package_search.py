@@ -0,0 +1,75 @@
+# benchmarks/bench_package_search.py
+#
+# Поиск тарифов по всем странам в кэше: построение индекса
+# и типичные запросы /find против полного перебора каталога.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_package_search
+
+import asyncio
+import timeit
+
+from benchmarks.catalog_sample import make_catalog
+from config import COUNTRY_CODES, REGIONS
+from utils.catalog_cache import CatalogCache
+from utils.package_search import PackageSearch, parse_search_query
+from utils.packages import duration_in_days
+
+QUERIES = [
+    "Европа 10 ГБ 30 дней",
+    "Азия 5 ГБ до 15$",
+    "20 гб 2 недели",
+    "до 3$",
+]
+
+
+def brute_force(cache: CatalogCache, search: PackageSearch, text: str, limit: int = 8):
+    """Тот же запрос полным перебором всех тарифов"""
+    query = parse_search_query(text, REGIONS)
+    allowed = search.region_countries.get(query.region) if query.region else None
+    rows = [
+        (country_code, package)
+        for country_code, table in cache.items()
+        if allowed is None or country_code in allowed
+        for package in table
+        if (query.min_volume is None or package.volume >= query.min_volume)
+        and (query.min_days is None or duration_in_days(package.duration, package.duration_unit) >= query.min_days)
+        and (query.max_price is None or package.price <= query.max_price)
+    ]
+    rows.sort(key=lambda row: row[1].sort_key[::-1])
+    return rows[:limit]
+
+
+def main(count_per_country: int = 60, number: int = 1000):
+    catalog = make_catalog(count_per_country)
+
+    async def fetch(country_code):
+        return catalog[country_code]
+
+    cache = CatalogCache(fetch)
+    for country_code in catalog:
+        asyncio.run(cache.refresh(country_code))
+
+    search = PackageSearch(cache, REGIONS, COUNTRY_CODES)
+    build = timeit.timeit(lambda: (setattr(search, "_generation", -1), search._ensure_index()), number=10) / 10
+    print(f"тарифов в индексе: {len(search)}, построение: {build * 1000:.1f} мс")
+
+    for text in QUERIES:
+        query = parse_search_query(text, REGIONS)
+
+        def run():
+            return search.search(
+                region=query.region,
+                min_volume=query.min_volume,
+                min_days=query.min_days,
+                max_price=query.max_price,
+                limit=8
+            )
+
+        indexed = timeit.timeit(run, number=number) / number
+        scanned = timeit.timeit(lambda: brute_force(cache, search, text), number=number // 10) / (number // 10)
+        same = [package.price for _, package in run()] == [package.price for _, package in brute_force(cache, search, text)]
+        print(f"{text:<24} индекс {indexed * 1000:>6.3f} мс, перебор {scanned * 1000:>7.2f} мс, совпадает: {same}")
+
+
+if __name__ == "__main__":
+    main()
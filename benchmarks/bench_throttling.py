@@ -0,0 +1,40 @@
+# benchmarks/bench_throttling.py
+#
+# Стоимость проверки лимитов ThrottlingMiddleware.check: один активный
+# пользователь, много разных пользователей и поток запросов, в котором
+# корзины неактивных пользователей удаляются по idle_ttl.
+#
+# Запуск из корня проекта: python -m benchmarks.bench_throttling
+
+import random
+import time
+
+from utils.throttling import ThrottlingMiddleware
+
+
+def run(name: str, user_ids, step: float, idle_ttl: float = 600) -> None:
+    """Прогоняет поток запросов с шагом времени step секунд"""
+    throttling = ThrottlingMiddleware(global_rate=1e9, global_burst=1e9, idle_ttl=idle_ttl)
+    now = 0.0
+    started = time.perf_counter()
+    for user_id in user_ids:
+        now += step
+        throttling.check(user_id, 1, now)
+    seconds = time.perf_counter() - started
+
+    stats = throttling.stats()
+    print(
+        f"{name:<28} {seconds / len(user_ids) * 1e9:>6.0f} нс/запрос  "
+        f"корзин {stats['users']:>6}, удалено {stats['expired']:>6}, ограничено {stats['throttled_user']:>6}"
+    )
+
+
+def main(count: int = 200_000):
+    rng = random.Random(1)
+    run("один пользователь", [1] * count, step=0.001)
+    run("100 000 пользователей", [rng.randrange(100_000) for _ in range(count)], step=0.001)
+    run("поток с удалением корзин", list(range(count)), step=0.01, idle_ttl=60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/catalog_sample.py
+#
+# Генератор ответа /package/list в формате eSIM Access для бенчмарков.
+# Поля и их объем повторяют реальный ответ API, значения синтетические.
+
+import random
+from typing import Any, Dict, List
+
+from config import COUNTRY_CODES
+
+VOLUMES_GB = [0.5, 1, 2, 3, 5, 10, 15, 20, 50]
+DURATIONS = [1, 3, 5, 7, 10, 15, 30, 60, 90, 180]
+
+
+def make_package(country_code: str, index: int, rng: random.Random) -> Dict[str, Any]:
+    """Один пакет packageList"""
+    volume_gb = rng.choice(VOLUMES_GB)
+    duration = rng.choice(DURATIONS)
+    price = int((volume_gb * 1.2 + duration * 0.05) * 10000)
+
+    return {
+        "packageCode": f"CK{country_code}{index:04d}",
+        "slug": f"{country_code}_{volume_gb}_{duration}",
+        "name": f"{country_code} {volume_gb}GB {duration}Days",
+        "price": price,
+        "currencyCode": "USD",
+        "volume": int(volume_gb * 1073741824),
+        "smsStatus": 0,
+        "dataType": 1,
+        "unusedValidTime": 180,
+        "duration": duration,
+        "durationUnit": "DAY",
+        "location": country_code,
+        "description": f"{country_code} {volume_gb}GB {duration}Days",
+        "activeType": 1,
+        "favorite": False,
+        "retailPrice": price * 2,
+        "speed": "3G/4G/5G",
+        "ipExport": "UK",
+        "supportTopUpType": 2,
+        "fupPolicy": "",
+        "locationNetworkList": [
+            {
+                "locationName": country_code,
+                "locationLogo": f"https://static.redteago.com/reddot-image/efficiency/flags/{country_code.lower()}.png",
+                "operatorList": [
+                    {"operatorName": f"Operator {n}", "networkType": "5G"} for n in range(3)
+                ]
+            }
+        ]
+    }
+
+
+def make_package_list(country_code: str, count: int = 60, seed: int = 0) -> List[Dict[str, Any]]:
+    """packageList для одной страны"""
+    rng = random.Random(f"{country_code}-{seed}")
+    return [make_package(country_code, i, rng) for i in range(count)]
+
+
+def make_catalog(count_per_country: int = 60) -> Dict[str, List[Dict[str, Any]]]:
+    """packageList по всем странам из config.COUNTRY_CODES"""
+    return {
+        code: make_package_list(code, count_per_country)
+        for code in dict.fromkeys(COUNTRY_CODES.values())
+    }
+
+
+def make_response(packages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Полный ответ /package/list"""
+    return {"success": True, "errorCode": "0", "errorMsg": None, "obj": {"packageList": packages}}
@@ -5,11 +5,106 @@ BOT_TOKEN = "7558767881:AAEhF9u1CtkMEqfx8v9KllMPeWm7mraI4kA"
 # API ключ для eSIM Access - замените на свой
 ESIM_ACCESS_CODE = "f3c52bbf67374e35a0daf72a81b5977c"
 
+# Настройки клиента eSIM Access
+# Таймаут запроса к эндпоинту без своего таймаута (в секундах)
+ESIM_API_TIMEOUT = 15
+# Таймауты по эндпоинтам (в секундах)
+ESIM_API_ENDPOINT_TIMEOUTS = {
+    "package/list": 20,
+    "esim/order": 30,
+    "esim/query": 10
+}
+# Повторы запросов на чтение (package/list, esim/query) при временных ошибках
+ESIM_API_RETRIES = 2
+# Базовая и максимальная задержка перед повтором (в секундах)
+ESIM_API_RETRY_BASE_DELAY = 0.5
+ESIM_API_RETRY_MAX_DELAY = 5
+# Сколько сбоев подряд считать недоступностью API
+ESIM_API_BREAKER_THRESHOLD = 5
+# Через сколько секунд после отключения пробовать API снова
+ESIM_API_BREAKER_RECOVERY = 30
+# Максимальное число одновременных запросов к API
+ESIM_API_CONCURRENCY = 20
+
+# Метрики в формате Prometheus (задержки и ошибки запросов к eSIM Access)
+METRICS_ENABLED = True
+# Сервер метрик слушает только локальный адрес
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9100
+METRICS_PATH = "/metrics"
+
+# Настройки кэша каталога тарифов
+# Время жизни записи каталога (в секундах)
+CATALOG_CACHE_TTL = 3600
+# Максимальное число стран в кэше
+CATALOG_CACHE_MAX_SIZE = 256
+# Максимальное число одновременных запросов при прогреве каталога
+CATALOG_WARMUP_CONCURRENCY = 5
+# Интервал повторного прогрева каталога (в секундах), чуть меньше TTL
+CATALOG_WARMUP_INTERVAL = 3000
+# Доля стран в кэше, после которой каталог считается прогретым
+CATALOG_WARMUP_READY_RATIO = 0.8
+# Интервал повторной загрузки недостающих стран, пока каталог не прогрет (в секундах)
+CATALOG_WARMUP_RETRY_INTERVAL = 60
+
+# Время актуальности статуса eSIM в кэше (в секундах)
+ESIM_STATUS_TTL = 60
+
+# Ожидание выпуска eSIM по оплаченным заказам
+# Первая задержка и максимальный интервал между проверками заказа (в секундах)
+PROVISIONING_INITIAL_DELAY = 2
+PROVISIONING_MAX_DELAY = 60
+# Через сколько секунд перестать опрашивать заказ и сообщить пользователю о задержке
+PROVISIONING_MAX_AGE = 1800
+
+# Файл для хранения file_id картинок, загруженных в Telegram
+PHOTO_CACHE_PATH = "data/photo_cache.json"
+# Каталог для уменьшенных копий картинок регионов
+IMAGE_CACHE_DIR = "data/images"
+
+# База SQLite с заказами пользователей
+ORDER_DB_PATH = "data/orders.sqlite3"
+# Количество eSIM на одной странице профиля
+PROFILE_PAGE_SIZE = 5
+# Число тарифов в ответе на /find
+SEARCH_RESULTS_LIMIT = 8
+
+# Хранилище состояний FSM: "sqlite" (сохраняется между перезапусками) или "memory"
+FSM_STORAGE = "sqlite"
+# База SQLite для состояний FSM
+FSM_DB_PATH = "data/fsm.sqlite3"
+
+# Режим получения обновлений: "polling" или "webhook"
+BOT_MODE = "polling"
+# Публичный URL вебхука, например "https://bot.example.com/webhook"
+WEBHOOK_URL = ""
+# Путь, по которому aiohttp-сервер принимает обновления
+WEBHOOK_PATH = "/webhook"
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token (если пусто - генерируется при запуске)
+WEBHOOK_SECRET = ""
+# Адрес и порт aiohttp-сервера
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8080
+# Максимальное число обновлений в обработке одновременно
+WEBHOOK_MAX_IN_FLIGHT = 100
+# Максимальное число одновременных соединений от Telegram
+WEBHOOK_MAX_CONNECTIONS = 40
+
+# Ограничение частоты запросов: токенов в секунду и емкость корзины
+# Обычный обработчик стоит 1 токен, загрузка каталога и оплата - больше
+# Емкость корзины должна быть в 2-3 раза больше самой дорогой стоимости (5),
+# иначе обычная покупка упирается в лимит на шаге оплаты
+THROTTLE_USER_RATE = 1.0
+THROTTLE_USER_BURST = 15
+THROTTLE_GLOBAL_RATE = 100
+THROTTLE_GLOBAL_BURST = 200
+# Через сколько секунд без запросов корзина пользователя удаляется из памяти
+THROTTLE_IDLE_TTL = 600
+
 # Коды стран для API eSIM Access
 COUNTRY_CODES = {
     # Азия
     "Тайланд": "TH",
-    "Таиланд": "TH",
     "Индонезия": "ID",
     "Китай": "CN",
     # Ближний восток
@@ -37,14 +132,44 @@ COUNTRY_CODES = {
     "Армения": "AM",
     # Африка
     "Южная Африка": "ZA",
-    "Южная африка": "ZA",
     "Буркина Фасо": "BF",
-    "Буркина фасо": "BF",
     "Нигер": "NE",
     # Океания
     "Австралия": "AU",
-    "Новая Зеландия": "NZ",
-    "Новая зеландия": "NZ"
+    "Новая Зеландия": "NZ"
+}
+
+# Другие названия стран для поиска по введенному тексту: английские,
+# сокращения и варианты написания. Регистр, "ё" и дефисы при поиске не важны,
+# ISO-коды стран ищутся автоматически.
+COUNTRY_ALIASES = {
+    "TH": ["Таиланд", "Thailand"],
+    "ID": ["Indonesia", "Бали", "Bali"],
+    "CN": ["China", "КНР"],
+    "TR": ["Turkey", "Türkiye"],
+    "EG": ["Egypt"],
+    "AE": ["UAE", "Объединенные Арабские Эмираты", "Эмираты", "United Arab Emirates", "Дубай", "Dubai"],
+    "SA": ["Saudi Arabia"],
+    "FR": ["France"],
+    "CZ": ["Czechia", "Czech Republic", "Чешская Республика"],
+    "RS": ["Serbia"],
+    "IT": ["Italy"],
+    "ES": ["Spain"],
+    "US": ["USA", "United States", "Соединенные Штаты", "Штаты"],
+    "CA": ["Canada"],
+    "MX": ["Mexico"],
+    "BR": ["Brazil"],
+    "AR": ["Argentina"],
+    "KZ": ["Kazakhstan"],
+    "BY": ["Belarus", "Белоруссия"],
+    "KG": ["Kyrgyzstan", "Киргизия"],
+    "UZ": ["Uzbekistan"],
+    "AM": ["Armenia"],
+    "ZA": ["South Africa", "ЮАР"],
+    "BF": ["Burkina Faso"],
+    "NE": ["Niger"],
+    "AU": ["Australia"],
+    "NZ": ["New Zealand"]
 }
 
 # Тексты для меню
@@ -153,6 +278,21 @@ TEXTS = {
 
     "nothing_found": "К сожалению, eSIM для этой страны временно нет в наличии.\n\nПопробуйте выбрать другую страну или напишите в поддержку",
 
+    "country_suggestions": "Не нашли страну «{query}». Возможно, вы имели в виду:",
+
+    "search_help": """Поиск тарифа по всем странам
+
+Напишите, что нужно, например:
+/find Европа 10 ГБ 30 дней
+/find Азия 5 ГБ до 15$
+/find 20 гб 2 недели
+
+Мы покажем самые дешевые подходящие тарифы.""",
+
+    "search_results": "Самые выгодные тарифы по вашему запросу:",
+
+    "search_nothing_found": "По вашему запросу тарифов не нашлось. Попробуйте смягчить условия или выберите страну из списка.",
+
     "loading_packages": "Загружаем доступные тарифы для {country_name}...",
 
     "choose_package": "Доступные тарифы для {country_name}:\nВыберите тариф для покупки:",
@@ -169,11 +309,14 @@ TEXTS = {
 
 Пожалуйста, подтвердите покупку.""",
 
+    "catalog_changed": "Условия тарифа обновились. Проверьте их и подтвердите покупку еще раз.\n\n",
+
     "processing_payment": "Обработка платежа... Пожалуйста, подождите.",
 
     "payment_success": "Платеж успешно обработан! Ваш заказ eSIM оформлен.",
 
     "payment_error": "Ошибка при заказе eSIM. Пожалуйста, попробуйте позже.",
+    "service_unavailable": "Сервис eSIM временно недоступен. Пожалуйста, попробуйте через пару минут.",
 
     "getting_esim_details": "Получение информации о вашей eSIM... Пожалуйста, подождите.",
 
@@ -186,8 +329,15 @@ QR-код для активации: {qr_code_url}
 
 Для активации отсканируйте QR-код или введите код активации в настройках вашего устройства.""",
 
+    "esim_provisioning": "eSIM создается. Как только она будет готова, мы пришлем данные для активации в этот чат. Их также можно будет посмотреть в разделе 'Мои eSIM'.",
+
     "esim_not_ready": "eSIM создается и будет готова в ближайшее время. Пожалуйста, проверьте позже в разделе 'Мои eSIM'.",
 
+    "esim_delayed": "Выпуск eSIM по заказу {order_no} занимает больше времени, чем обычно. Заказ оплачен и сохранен: данные для активации появятся в разделе 'Мои eSIM'. Если их долго нет, напишите в поддержку и укажите номер заказа.",
+
+    "stale_button": "Эта кнопка устарела. Откройте меню заново: /start",
+    "throttled": "Слишком много запросов, попробуйте через пару секунд",
+
     "operation_cancelled": "Операция отменена. Для начала работы с ботом снова, нажмите кнопку ниже."
 }
 
@@ -221,12 +371,12 @@ REGIONS = {
     "africa": {
         "name": "Африка",
         "image": "images/africa.jpg",
-        "countries": ["Южная африка", "Буркина фасо", "Нигер", "Египет"]
+        "countries": ["Южная Африка", "Буркина Фасо", "Нигер", "Египет"]
     },
     "oceania": {
         "name": "Океания",
         "image": "images/oceania.jpg",
-        "countries": ["Австралия", "Новая зеландия"]
+        "countries": ["Австралия", "Новая Зеландия"]
     }
 }
 
@@ -4,22 +4,27 @@ from aiogram import Router
 
 from . import start
 from . import buying
+from . import search
 from . import profile
 from . import setup
 from . import questions
 from . import menu
+from .callbacks import callbacks
 
 
 def setup_routers() -> Router:
     """Настройка всех роутеров"""
     router = Router()
 
-    # Подключаем все роутеры
+    # Все callback-запросы разбираются одной таблицей маршрутов
+    router.include_router(callbacks)
+
+    # Роутеры сообщений (в start также ответ на устаревшие кнопки,
+    # поэтому он подключается после таблицы callback-запросов)
     router.include_router(start.router)
+    # Поиск раньше покупки: иначе /find в состоянии выбора страны
+    # будет воспринят как название страны
+    router.include_router(search.router)
     router.include_router(buying.router)
-    router.include_router(profile.router)
-    router.include_router(setup.router)
-    router.include_router(questions.router)
-    router.include_router(menu.router)
 
     return router
\ No newline at end of file
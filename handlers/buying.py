@@ -1,6 +1,6 @@
 # handlers/buying.py
 
-from aiogram import Router, F
+from aiogram import Router, flags
 from aiogram.types import CallbackQuery, FSInputFile, InputMediaPhoto, Message
 from aiogram.filters.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
@@ -10,20 +10,27 @@ from keyboards.inline import (
     get_packages_keyboard,
     get_confirm_keyboard,
     get_payment_done_keyboard,
+    get_esim_delayed_keyboard,
     get_back_to_countries_keyboard,
     get_back_to_main_keyboard
 )
-from config import TEXTS, REGIONS, COUNTRY_CODES
-from utils.esim_client import ESIMAccessClient
-from config import ESIM_ACCESS_CODE
-import asyncio
+from config import TEXTS, REGIONS
+from keyboards.callback_data import RegionCallback, CountryCallback, PackageCallback
+from loader import (
+    esim_client,
+    catalog_cache,
+    country_index,
+    photo_cache,
+    provisioning_poller,
+    esim_status_cache
+)
+from utils.esim_client import ESIMAccessError
+from utils.provisioning import is_profile_ready
+from handlers.callbacks import callbacks
 from handlers.profile import save_order
 
 router = Router()
 
-# Создаем экземпляр клиента eSIM Access
-esim_client = ESIMAccessClient(ESIM_ACCESS_CODE)
-
 
 # Определяем состояния FSM для процесса покупки
 class BuyingStates(StatesGroup):
@@ -33,7 +40,7 @@ class BuyingStates(StatesGroup):
     payment_processing = State()
 
 
-@router.callback_query(F.data == "buy_esim")
+@callbacks.exact("buy_esim")
 async def buy_esim(callback: CallbackQuery, state: FSMContext):
     """Обработчик для покупки eSIM - выбор региона"""
     # Очищаем данные состояния
@@ -48,33 +55,48 @@ async def buy_esim(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("region_"))
-async def select_region(callback: CallbackQuery, state: FSMContext):
+@callbacks.prefix(RegionCallback)
+async def select_region(callback: CallbackQuery, state: FSMContext, callback_data: RegionCallback):
     """Обработчик выбора региона"""
-    region_key = callback.data.split("_")[1]
+    region_key = callback_data.key
 
     if region_key in REGIONS:
         region_data = REGIONS[region_key]
+        image_path = region_data["image"]
         try:
-            photo = FSInputFile(region_data["image"])
+            # Используем file_id, если картинка уже загружалась в Telegram
+            photo = photo_cache.get(image_path)
             # Пробуем отредактировать сообщение
-            await callback.message.edit_media(
+            result = await callback.message.edit_media(
                 media=InputMediaPhoto(
                     media=photo,
                     caption=TEXTS["select_country"]
                 ),
                 reply_markup=get_countries_keyboard(region_key, region_data["countries"])
             )
+            photo_cache.remember(image_path, result)
         except Exception as e:
             # Если не удается отредактировать, отправляем новое сообщение
             await callback.message.delete()
             try:
-                photo = FSInputFile(region_data["image"])
-                await callback.message.answer_photo(
-                    photo=photo,
-                    caption=TEXTS["select_country"],
-                    reply_markup=get_countries_keyboard(region_key, region_data["countries"])
-                )
+                photo = photo_cache.get(image_path)
+                try:
+                    result = await callback.message.answer_photo(
+                        photo=photo,
+                        caption=TEXTS["select_country"],
+                        reply_markup=get_countries_keyboard(region_key, region_data["countries"])
+                    )
+                except Exception:
+                    if isinstance(photo, FSInputFile):
+                        raise
+                    # Сохраненный file_id больше не действителен, загружаем файл заново
+                    photo_cache.forget(image_path)
+                    result = await callback.message.answer_photo(
+                        photo=FSInputFile(image_path),
+                        caption=TEXTS["select_country"],
+                        reply_markup=get_countries_keyboard(region_key, region_data["countries"])
+                    )
+                photo_cache.remember(image_path, result)
             except:
                 # Если нет картинки, отправляем текст
                 await callback.message.answer(
@@ -83,17 +105,29 @@ async def select_region(callback: CallbackQuery, state: FSMContext):
                 )
 
     await callback.answer()
+    # Регион нужен для кнопки "Назад к выбору стран"
+    await state.update_data(region=callback_data.region)
     await state.set_state(BuyingStates.selecting_country)
 
 
-@router.callback_query(BuyingStates.selecting_country, F.data.startswith("country_"))
-async def select_country(callback: CallbackQuery, state: FSMContext):
-    """Обработчик выбора страны"""
-    country_name = callback.data.replace("country_", "")
+def get_back_to_region_callback(data: dict) -> str:
+    """callback_data для возврата к странам выбранного региона"""
+    region = data.get("region")
+    return RegionCallback(region=region).pack() if region is not None else "buy_esim"
+
+
+@callbacks.prefix(
+    CountryCallback,
+    state=(BuyingStates.selecting_country, BuyingStates.selecting_package, BuyingStates.confirming_purchase)
+)
+@flags.throttling_cost(5)
+async def select_country(callback: CallbackQuery, state: FSMContext, callback_data: CountryCallback):
+    """Обработчик выбора страны (и возврата к тарифам страны)"""
+    country_code = callback_data.country
 
-    # Проверяем, есть ли код страны
-    if country_name in COUNTRY_CODES:
-        country_code = COUNTRY_CODES[country_name]
+    # Проверяем, знаем ли мы такую страну
+    if country_code in country_index:
+        country_name = country_index.name(country_code)
 
         # Сохраняем информацию о стране
         await state.update_data(
@@ -113,17 +147,22 @@ async def select_country(callback: CallbackQuery, state: FSMContext):
             message = await callback.message.edit_text(text=loading_text)
 
         # Получаем пакеты для выбранной страны
-        packages = esim_client.get_packages_by_country(country_code)
+        try:
+            packages = await catalog_cache.get(country_code)
+            no_packages_text = TEXTS["no_packages"].format(country_name=country_name)
+        except ESIMAccessError:
+            # API недоступен, а каталога в кэше нет - это не "нет тарифов"
+            packages = None
+            no_packages_text = TEXTS["service_unavailable"]
 
-        # Сохраняем пакеты в состоянии
-        await state.update_data(packages=packages)
+        # Сохраняем в состоянии только версию каталога, сами пакеты берутся из кэша
+        await state.update_data(catalog_version=catalog_cache.version(country_code))
 
         if not packages:
-            # Если пакеты не найдены
-            no_packages_text = TEXTS["no_packages"].format(country_name=country_name)
+            # Если пакеты не найдены или API недоступен
             await message.edit_text(
                 text=no_packages_text,
-                reply_markup=get_back_to_countries_keyboard(callback.data.split("_")[0])
+                reply_markup=get_back_to_countries_keyboard(get_back_to_region_callback(await state.get_data()))
             )
             await callback.answer()
             return
@@ -152,74 +191,69 @@ async def select_country(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(BuyingStates.selecting_package, F.data.startswith("package_"))
-async def select_package(callback: CallbackQuery, state: FSMContext):
+@callbacks.prefix(PackageCallback, state=BuyingStates.selecting_package)
+async def select_package(callback: CallbackQuery, state: FSMContext, callback_data: PackageCallback):
     """Обработчик выбора тарифа"""
     # Получаем индекс выбранного пакета
-    package_index = int(callback.data.split("_")[1])
+    package_index = callback_data.index
 
     # Получаем данные из состояния
     data = await state.get_data()
-    packages = data.get("packages", [])
     country_name = data.get("country_name", "")
     country_code = data.get("country_code", "")
 
-    if not packages or package_index >= len(packages):
+    # Пакеты берем из общего каталога, если его версия не изменилась
+    packages = catalog_cache.peek(country_code)
+    if packages is not None and catalog_cache.version(country_code) != data.get("catalog_version"):
+        packages = None
+
+    if not packages or not 0 <= package_index < len(packages):
         # Если пакет не найден
         await callback.message.edit_text(
             text="Ошибка: выбранный тариф не найден. Попробуйте снова.",
-            reply_markup=get_back_to_countries_keyboard(f"region_{country_code}")
+            reply_markup=get_back_to_countries_keyboard(get_back_to_region_callback(data))
         )
         await callback.answer()
         return
 
-    # Получаем выбранный пакет
-    package = packages[package_index]
-
-    # Сохраняем выбранный пакет
-    await state.update_data(selected_package=package)
+    # Получаем выбранный пакет и отправляем подтверждение
+    await show_confirmation(callback.message, state, country_name, country_code, packages[package_index])
+    await callback.answer()
 
-    # Форматируем детали пакета
-    package_name = package.get("name", "Неизвестный тариф")
-    volume_bytes = package.get("volume", 0)
-    duration = package.get("duration", 0)
-    duration_unit = package.get("durationUnit", "DAY")
-    price = package.get("price", 0) / 10000  # Преобразование в доллары
 
-    # Преобразование байтов в МБ или ГБ
-    if volume_bytes >= 1073741824:  # 1 ГБ
-        volume_str = f"{volume_bytes / 1073741824:.1f} ГБ"
-    else:
-        volume_str = f"{volume_bytes / 1048576:.0f} МБ"
+async def show_confirmation(message, state: FSMContext, country_name: str, country_code: str, package, notice: str = ""):
+    """
+    Показывает подтверждение покупки тарифа
 
-    # Форматирование срока действия
-    if duration_unit == "DAY":
-        duration_str = f"{duration} дней"
-    elif duration_unit == "MONTH":
-        duration_str = f"{duration} месяцев"
-    else:
-        duration_str = f"{duration} {duration_unit}"
+    В состоянии сохраняются код тарифа и версия каталога, по которой
+    пользователь видел условия: заказ оформляется только по этой версии.
+    """
+    await state.update_data(
+        country_name=country_name,
+        country_code=country_code,
+        catalog_version=catalog_cache.version(country_code),
+        package_code=package.code
+    )
 
-    # Формируем текст подтверждения
-    confirmation_text = TEXTS["confirm_purchase"].format(
+    # Формируем текст подтверждения из заранее вычисленных полей
+    confirmation_text = notice + TEXTS["confirm_purchase"].format(
         country=country_name,
-        package_name=package_name,
-        volume=volume_str,
-        duration=duration_str,
-        price=price
+        package_name=package.name,
+        volume=package.volume_text,
+        duration=package.duration_text,
+        price=package.price_usd
     )
 
-    # Отправляем подтверждение
-    await callback.message.edit_text(
+    await message.edit_text(
         text=confirmation_text,
         reply_markup=get_confirm_keyboard(country_code)
     )
 
     await state.set_state(BuyingStates.confirming_purchase)
-    await callback.answer()
 
 
-@router.callback_query(BuyingStates.confirming_purchase, F.data == "confirm_purchase")
+@callbacks.exact("confirm_purchase", state=BuyingStates.confirming_purchase)
+@flags.throttling_cost(3)
 async def process_payment(callback: CallbackQuery, state: FSMContext):
     """Обработчик подтверждения покупки и оплаты"""
     # Отправляем сообщение о обработке платежа
@@ -228,7 +262,17 @@ async def process_payment(callback: CallbackQuery, state: FSMContext):
 
     # Получаем данные из состояния
     data = await state.get_data()
-    package = data.get("selected_package", {})
+    country_code = data.get("country_code", "")
+    package = None
+    try:
+        if data.get("package_code"):
+            package = await catalog_cache.find_package(country_code, data["package_code"])
+    except ESIMAccessError:
+        await callback.message.edit_text(
+            text=TEXTS["service_unavailable"],
+            reply_markup=get_back_to_main_keyboard()
+        )
+        return
 
     if not package:
         await callback.message.edit_text(
@@ -237,20 +281,38 @@ async def process_payment(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    # Заказываем eSIM
-    package_code = package.get("packageCode", "")
-    price = package.get("price", 0)
+    if catalog_cache.version(country_code) != data.get("catalog_version"):
+        # Каталог обновился после показа подтверждения: цена или условия могли
+        # измениться, поэтому заказываем только после повторного подтверждения
+        await show_confirmation(
+            callback.message,
+            state,
+            data.get("country_name", ""),
+            country_code,
+            package,
+            notice=TEXTS["catalog_changed"]
+        )
+        return
 
-    order_no = esim_client.order_profile(
-        package_code=package_code,
-        price=price,
-        count=1
-    )
+    # Заказываем eSIM
+    package_code = package.code
+    price = package.price
+
+    try:
+        order_no = await esim_client.order_profile(
+            package_code=package_code,
+            price=price,
+            count=1
+        )
+        error_text = TEXTS["payment_error"]
+    except ESIMAccessError:
+        order_no = None
+        error_text = TEXTS["service_unavailable"]
 
     if not order_no:
-        # Если заказ не удался
+        # Если заказ не удался: API отклонил заказ или недоступен
         await callback.message.edit_text(
-            text=TEXTS["payment_error"],
+            text=error_text,
             reply_markup=get_back_to_main_keyboard()
         )
         return
@@ -258,11 +320,15 @@ async def process_payment(callback: CallbackQuery, state: FSMContext):
     # Сохраняем номер заказа
     await state.update_data(order_no=order_no)
 
-    # Сохраняем информацию о заказе в профиле пользователя
+    # Данные eSIM придут пользователю в этот чат, как только она будет выпущена
+    # Регистрируем до записи в базу: заказ уже оплачен, ошибка базы не должна его потерять
     user_id = callback.from_user.id
+    provisioning_poller.register(order_no, user_id, callback.message.chat.id)
+
+    # Сохраняем информацию о заказе в профиле пользователя
     country_name = data.get("country_name", "")
-    package_name = package.get("name", "")
-    save_order(user_id, order_no, country_name, package_name)
+    package_name = package.name
+    await save_order(user_id, order_no, country_name, package_name)
 
     # Отправляем сообщение об успешной оплате
     await callback.message.edit_text(
@@ -273,7 +339,41 @@ async def process_payment(callback: CallbackQuery, state: FSMContext):
     await state.set_state(BuyingStates.payment_processing)
 
 
-@router.callback_query(BuyingStates.payment_processing, F.data == "show_esim_details")
+def format_esim_details(profile):
+    """Формирует текст с данными для активации eSIM"""
+    return TEXTS["esim_details"].format(
+        iccid=profile.get("iccid", ""),
+        ac=profile.get("ac", ""),  # Activation Code
+        qr_code_url=profile.get("qrCodeUrl", "")
+    )
+
+
+@provisioning_poller.on_ready
+async def send_esim_details(bot, order, profile):
+    """Отправляет пользователю данные eSIM, когда она выпущена"""
+    # Заказ перешел в состояние "выпущена" - обновляем кэш профилей
+    esim_status_cache.put(order.order_no, [profile])
+    await bot.send_message(
+        chat_id=order.chat_id,
+        text=format_esim_details(profile),
+        reply_markup=get_back_to_main_keyboard(),
+        disable_web_page_preview=False  # Показываем QR-код, если URL указывает на изображение
+    )
+
+
+@provisioning_poller.on_expired
+async def send_esim_delayed(bot, order):
+    """Сообщает пользователю, что eSIM не выпущена за отведенное время"""
+    # Заказ уже оплачен: без сообщения пользователь так и ждал бы данных в чате
+    await bot.send_message(
+        chat_id=order.chat_id,
+        text=TEXTS["esim_delayed"].format(order_no=order.order_no),
+        reply_markup=get_esim_delayed_keyboard()
+    )
+
+
+@callbacks.exact("show_esim_details", state=BuyingStates.payment_processing)
+@flags.throttling_cost(3)
 async def show_esim_details(callback: CallbackQuery, state: FSMContext):
     """Показать детали купленной eSIM"""
     await callback.answer()
@@ -293,35 +393,22 @@ async def show_esim_details(callback: CallbackQuery, state: FSMContext):
         await state.clear()
         return
 
-    # Ждем, пока eSIM будет готова (может занять некоторое время)
+    # Пока заказ в очереди опроса, API не запрашиваем - данные придут сами
     profiles = []
-    for _ in range(5):  # Максимум 5 попыток
-        profiles = esim_client.query_order(order_no)
-        if profiles:
-            break
-        await asyncio.sleep(2)  # Ждем 2 секунды между попытками
+    if not provisioning_poller.is_pending(order_no):
+        profiles = await esim_status_cache.get(order_no)
 
-    if not profiles:
+    if not profiles or not is_profile_ready(profiles[0]):
+        provisioning_poller.register(order_no, callback.from_user.id, callback.message.chat.id)
         await callback.message.edit_text(
-            text=TEXTS["esim_not_ready"],
+            text=TEXTS["esim_provisioning"],
             reply_markup=get_back_to_main_keyboard()
         )
         await state.clear()
         return
 
     # Берем первый профиль из заказа
-    profile = profiles[0]
-
-    # Формируем информацию о профиле
-    ac = profile.get("ac", "")  # Activation Code
-    qr_code_url = profile.get("qrCodeUrl", "")
-    iccid = profile.get("iccid", "")
-
-    esim_details = TEXTS["esim_details"].format(
-        iccid=iccid,
-        ac=ac,
-        qr_code_url=qr_code_url
-    )
+    esim_details = format_esim_details(profiles[0])
 
     # Отправляем детали eSIM
     await callback.message.edit_text(
@@ -334,7 +421,7 @@ async def show_esim_details(callback: CallbackQuery, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data == "cancel_purchase")
+@callbacks.exact("cancel_purchase")
 async def cancel_purchase(callback: CallbackQuery, state: FSMContext):
     """Отмена покупки"""
     await callback.message.edit_text(
@@ -347,13 +434,15 @@ async def cancel_purchase(callback: CallbackQuery, state: FSMContext):
 
 # Обработчик вввода страны текстом
 @router.message(BuyingStates.selecting_country)
+@flags.throttling_cost(5)
 async def process_country_text(message: Message, state: FSMContext):
     """Обработка ввода названия страны текстом"""
-    country_name = message.text.strip().capitalize()
+    match = country_index.lookup(message.text or "")
 
-    # Проверяем, есть ли код страны
-    if country_name in COUNTRY_CODES:
-        country_code = COUNTRY_CODES[country_name]
+    # Проверяем, удалось ли однозначно определить страну
+    if match is not None:
+        country_name = match.name
+        country_code = match.code
 
         # Сохраняем информацию о стране
         await state.update_data(
@@ -367,14 +456,19 @@ async def process_country_text(message: Message, state: FSMContext):
         )
 
         # Получаем пакеты для выбранной страны
-        packages = esim_client.get_packages_by_country(country_code)
+        try:
+            packages = await catalog_cache.get(country_code)
+            no_packages_text = TEXTS["no_packages"].format(country_name=country_name)
+        except ESIMAccessError:
+            # API недоступен, а каталога в кэше нет - это не "нет тарифов"
+            packages = None
+            no_packages_text = TEXTS["service_unavailable"]
 
-        # Сохраняем пакеты в состоянии
-        await state.update_data(packages=packages)
+        # Сохраняем в состоянии только версию каталога, сами пакеты берутся из кэша
+        await state.update_data(catalog_version=catalog_cache.version(country_code))
 
         if not packages:
-            # Если пакеты не найдены
-            no_packages_text = TEXTS["no_packages"].format(country_name=country_name)
+            # Если пакеты не найдены или API недоступен
             await loading_message.edit_text(
                 text=no_packages_text,
                 reply_markup=get_buy_esim_keyboard()
@@ -389,7 +483,16 @@ async def process_country_text(message: Message, state: FSMContext):
         )
         await state.set_state(BuyingStates.selecting_package)
     else:
-        # Если код страны не найден
+        suggestions = country_index.suggest(message.text or "")
+        if suggestions:
+            # Предлагаем похожие страны кнопками, чтобы не вводить название заново
+            await message.answer(
+                text=TEXTS["country_suggestions"].format(query=message.text.strip()),
+                reply_markup=get_countries_keyboard(None, [match.name for match in suggestions])
+            )
+            return
+
+        # Если страна не найдена
         await message.answer(
             text=TEXTS["nothing_found"],
             reply_markup=get_buy_esim_keyboard()
@@ -0,0 +1,6 @@
+# handlers/callbacks.py
+
+from utils.callback_router import CallbackRouter
+
+# Общая таблица маршрутов callback-запросов всех разделов бота
+callbacks = CallbackRouter(name="callbacks")
@@ -1,6 +1,5 @@
 # handlers/menu.py
 
-from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from keyboards.inline import (
     get_back_to_main_keyboard,
@@ -11,11 +10,11 @@ from keyboards.inline import (
     get_feedback_no_keyboard
 )
 from config import TEXTS
+from handlers.callbacks import callbacks
+from keyboards.callback_data import FeedbackCallback
 
-router = Router()
 
-
-@router.callback_query(F.data == "partner")
+@callbacks.exact("partner")
 async def show_partner(callback: CallbackQuery):
     """Показать информацию о партнерстве"""
     await callback.message.edit_text(
@@ -25,7 +24,7 @@ async def show_partner(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "partner_referral")
+@callbacks.exact("partner_referral")
 async def show_partner_referral(callback: CallbackQuery):
     """Показать информацию о партнерской программе"""
     await callback.message.edit_text(
@@ -35,7 +34,7 @@ async def show_partner_referral(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "partner_community")
+@callbacks.exact("partner_community")
 async def show_partner_community(callback: CallbackQuery):
     """Показать информацию о монетизации сообщества"""
     await callback.message.edit_text(
@@ -45,19 +44,17 @@ async def show_partner_community(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "share_referral")
+@callbacks.exact("share_referral")
 async def share_referral(callback: CallbackQuery):
     """Поделиться реферальной ссылкой"""
     # Здесь будет логика проверки объема покупок и генерации ссылки
     await callback.answer("Функция будет доступна при объеме покупок от 1000₽")
 
 
-@router.callback_query(F.data.startswith("feedback_"))
-async def handle_feedback(callback: CallbackQuery):
+@callbacks.prefix(FeedbackCallback)
+async def handle_feedback(callback: CallbackQuery, callback_data: FeedbackCallback):
     """Обработка обратной связи"""
-    feedback_type = callback.data.replace("feedback_", "")
-    
-    if feedback_type == "yes":
+    if callback_data.helpful:
         await callback.message.edit_text(
             text=TEXTS["feedback_yes"],
             reply_markup=get_back_to_main_keyboard()
@@ -71,7 +68,7 @@ async def handle_feedback(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "support")
+@callbacks.exact("support")
 async def show_support(callback: CallbackQuery):
     """Показать контакты поддержки"""
     # Здесь будет логика отображения контактов поддержки
@@ -1,65 +1,116 @@
 # handlers/profile.py
 
-from aiogram import Router, F
+from aiogram import flags
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton
 from aiogram.filters.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from keyboards.inline import get_profile_keyboard, get_back_to_main_keyboard
-from config import TEXTS, ESIM_ACCESS_CODE
-from utils.esim_client import ESIMAccessClient
+from config import TEXTS, PROFILE_PAGE_SIZE
+from loader import esim_status_cache, order_store
+from handlers.callbacks import callbacks
+from keyboards.callback_data import ProfilePageCallback, ESIMCallback, ActivateESIMCallback
 import logging
 
-router = Router()
 logger = logging.getLogger(__name__)
 
-# Создаем экземпляр клиента eSIM Access
-esim_client = ESIMAccessClient(ESIM_ACCESS_CODE)
-
-# Хранилище для заказов пользователей
-# В реальном приложении лучше использовать базу данных
-user_orders = {}
-
 
 class ProfileStates(StatesGroup):
     viewing_profile = State()
     viewing_esim = State()
 
 
-@router.callback_query(F.data == "profile")
+def get_status_badge(profiles):
+    """Значок статуса eSIM для списка в профиле"""
+    if not profiles:
+        return "⏳"
+    return "✅" if profiles[0].get("status") == "ACTIVE" else "📲"
+
+
+@callbacks.exact("profile")
+@flags.throttling_cost(3)
 async def show_profile(callback: CallbackQuery, state: FSMContext):
     """Показать профиль пользователя"""
+    await show_profile_page(callback, state)
+
+
+@callbacks.prefix(ProfilePageCallback)
+@flags.throttling_cost(3)
+async def show_profile_cursor(callback: CallbackQuery, state: FSMContext, callback_data: ProfilePageCallback):
+    """Соседняя страница профиля: более старые или более новые eSIM"""
+    if callback_data.older:
+        await show_profile_page(callback, state, before_id=callback_data.cursor)
+    else:
+        await show_profile_page(callback, state, after_id=callback_data.cursor)
+
+
+async def show_profile_page(callback: CallbackQuery, state: FSMContext, before_id=None, after_id=None):
+    """Показать страницу профиля, начиная с курсора"""
     user_id = callback.from_user.id
 
-    # Получаем заказы пользователя (заглушка)
-    orders = user_orders.get(user_id, [])
+    # Получаем страницу заказов пользователя
+    orders, has_more = await order_store.get_user_orders_page(
+        user_id,
+        before_id=before_id,
+        after_id=after_id,
+        limit=PROFILE_PAGE_SIZE
+    )
 
-    if not orders:
+    # Есть ли страницы новее и старше текущей
+    if after_id is not None:
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = before_id is not None, has_more
+
+    if not orders and before_id is None and after_id is None:
         # Если у пользователя нет заказов
         await callback.message.edit_text(
             text=f"{TEXTS['profile']}\n\nУ вас пока нет активированных eSIM. Нажмите на кнопку «Купить eSIM», чтобы приобрести новую.",
             reply_markup=get_profile_keyboard()
         )
+    elif not orders:
+        # Страница опустела (например, заказы удалены) - возвращаемся к началу
+        await show_profile_page(callback, state)
+        return
     else:
+        # Получаем статусы всех eSIM страницы одним параллельным запросом
+        statuses = await esim_status_cache.get_many([order['order_no'] for order in orders])
+
         # Формируем текст с имеющимися eSIM
         profile_text = TEXTS['profile'] + "\n\n"
 
-        for i, order in enumerate(orders):
-            order_no = order.get('order_no', 'Неизвестный')
+        for order in orders:
             country = order.get('country', 'Неизвестная страна')
             date = order.get('date', 'Неизвестная дата')
+            badge = get_status_badge(statuses.get(order['order_no'], []))
 
-            profile_text += f"{i + 1}. eSIM {country} - {date}\n"
+            profile_text += f"{badge} eSIM {country} - {date}\n"
+
+        profile_text += "\n✅ — активна, 📲 — не активирована, ⏳ — создается"
 
         # Создаем клавиатуру с eSIM
         builder = InlineKeyboardBuilder()
 
-        for i, order in enumerate(orders):
+        for order in orders:
             country = order.get('country', 'Неизвестная страна')
+            badge = get_status_badge(statuses.get(order['order_no'], []))
             builder.row(
-                InlineKeyboardButton(text=f"eSIM {country}", callback_data=f"esim_{i}")
+                InlineKeyboardButton(text=f"{badge} eSIM {country}", callback_data=ESIMCallback(order_id=order['id']).pack())
             )
 
+        # Курсоры страниц - ID первого и последнего заказа на странице
+        navigation = []
+        if has_newer:
+            navigation.append(
+                InlineKeyboardButton(text="◀️ Новее", callback_data=ProfilePageCallback(cursor=orders[0]['id'], older=False).pack())
+            )
+        if has_older:
+            navigation.append(
+                InlineKeyboardButton(text="Старше ▶️", callback_data=ProfilePageCallback(cursor=orders[-1]['id'], older=True).pack())
+            )
+        if navigation:
+            builder.row(*navigation)
+
         builder.row(
             InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main")
         )
@@ -73,18 +124,19 @@ async def show_profile(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(ProfileStates.viewing_profile, F.data.startswith("esim_"))
-async def show_esim_details(callback: CallbackQuery, state: FSMContext):
+@callbacks.prefix(ESIMCallback, state=ProfileStates.viewing_profile)
+@flags.throttling_cost(3)
+async def show_esim_details(callback: CallbackQuery, state: FSMContext, callback_data: ESIMCallback):
     """Показать детали eSIM"""
     user_id = callback.from_user.id
 
-    # Получаем индекс eSIM
-    esim_index = int(callback.data.split('_')[1])
+    # Получаем ID заказа
+    order_id = callback_data.order_id
 
     # Получаем данные о заказе
-    orders = user_orders.get(user_id, [])
+    order = await order_store.get_order(user_id, order_id)
 
-    if not orders or esim_index >= len(orders):
+    if not order:
         await callback.message.edit_text(
             text="eSIM не найдена. Возможно, она была удалена.",
             reply_markup=get_back_to_main_keyboard()
@@ -92,11 +144,10 @@ async def show_esim_details(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
         return
 
-    order = orders[esim_index]
     order_no = order.get('order_no', '')
 
-    # Получаем данные eSIM через API
-    profiles = esim_client.query_order(order_no)
+    # Получаем данные eSIM (статус кэшируется ненадолго)
+    profiles = await esim_status_cache.get(order_no)
 
     if not profiles:
         await callback.message.edit_text(
@@ -119,7 +170,7 @@ async def show_esim_details(callback: CallbackQuery, state: FSMContext):
     status_text = "Активна" if status == "ACTIVE" else "Не активирована"
 
     esim_details = f"""
-eSIM #{esim_index + 1}
+eSIM {order.get('country', '')} - {order.get('date', '')}
 
 ICCID: {iccid}
 Статус: {status_text}
@@ -136,7 +187,7 @@ QR-код для активации: {qr_code_url}
     # Если eSIM не активирована, добавляем кнопку активации
     if status != "ACTIVE":
         builder.row(
-            InlineKeyboardButton(text="📲 Активировать", callback_data=f"activate_esim_{esim_index}")
+            InlineKeyboardButton(text="📲 Активировать", callback_data=ActivateESIMCallback(order_id=order_id).pack())
         )
 
     builder.row(
@@ -154,9 +205,14 @@ QR-код для активации: {qr_code_url}
 
 
 # Заглушка для активации eSIM
-@router.callback_query(ProfileStates.viewing_esim, F.data.startswith("activate_esim_"))
-async def activate_esim(callback: CallbackQuery, state: FSMContext):
+@callbacks.prefix(ActivateESIMCallback, state=ProfileStates.viewing_esim)
+async def activate_esim(callback: CallbackQuery, state: FSMContext, callback_data: ActivateESIMCallback):
     """Активация eSIM"""
+    # После установки статус eSIM изменится - следующий просмотр запросит его заново
+    order = await order_store.get_order(callback.from_user.id, callback_data.order_id)
+    if order is not None:
+        esim_status_cache.invalidate(order['order_no'])
+
     await callback.message.edit_text(
         text="eSIM активируется автоматически при установке. Следуйте инструкциям в разделе «Как установить eSIM».",
         reply_markup=get_back_to_main_keyboard()
@@ -165,18 +221,18 @@ async def activate_esim(callback: CallbackQuery, state: FSMContext):
 
 
 # Функция для сохранения информации о заказе
-def save_order(user_id, order_no, country, package_name):
-    """Сохраняет информацию о заказе пользователя"""
-    from datetime import datetime
-
-    order_info = {
-        'order_no': order_no,
-        'country': country,
-        'package_name': package_name,
-        'date': datetime.now().strftime('%d.%m.%Y')
-    }
-
-    if user_id not in user_orders:
-        user_orders[user_id] = []
-
-    user_orders[user_id].append(order_info)
\ No newline at end of file
+async def save_order(user_id, order_no, country, package_name):
+    """
+    Сохраняет информацию о заказе пользователя
+
+    Ошибка базы только записывается в лог: заказ в eSIM Access уже создан
+    и оплачен, поэтому покупка не должна прерываться.
+
+    :return: True, если заказ сохранен
+    """
+    try:
+        await order_store.add_order(user_id, order_no, country, package_name)
+        return True
+    except Exception as e:
+        logger.error(f"Не удалось сохранить заказ {order_no} пользователя {user_id}: {e}")
+        return False
@@ -1,14 +1,13 @@
 # handlers/questions.py
 
-from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from keyboards.inline import get_questions_keyboard, get_qa_back_keyboard, get_feedback_keyboard
 from config import TEXTS, QA_ITEMS
+from handlers.callbacks import callbacks
+from keyboards.callback_data import QuestionCallback
 
-router = Router()
 
-
-@router.callback_query(F.data == "questions")
+@callbacks.exact("questions")
 async def show_questions(callback: CallbackQuery):
     """Показать меню вопросов и ответов"""
     await callback.message.edit_text(
@@ -18,10 +17,10 @@ async def show_questions(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("qa_"))
-async def show_answer(callback: CallbackQuery):
+@callbacks.prefix(QuestionCallback)
+async def show_answer(callback: CallbackQuery, callback_data: QuestionCallback):
     """Показать ответ на выбранный вопрос"""
-    qa_key = callback.data.replace("qa_", "")
+    qa_key = callback_data.key
 
     if qa_key in QA_ITEMS:
         qa_item = QA_ITEMS[qa_key]
@@ -0,0 +1,74 @@
+# handlers/search.py
+
+from aiogram import Router, flags
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, Message
+from keyboards.inline import (
+    get_buy_esim_keyboard,
+    get_back_to_main_keyboard,
+    get_search_results_keyboard
+)
+from config import TEXTS, REGIONS, SEARCH_RESULTS_LIMIT
+from loader import catalog_cache, country_index, package_search
+from utils.package_search import parse_search_query
+from handlers.buying import show_confirmation
+from handlers.callbacks import callbacks
+from keyboards.callback_data import FoundPackageCallback
+
+router = Router()
+
+
+@router.message(Command("find"))
+@flags.throttling_cost(2)
+async def cmd_find(message: Message, command: CommandObject, state: FSMContext):
+    """Поиск тарифов по всем странам: /find Европа 10 ГБ 30 дней"""
+    query = parse_search_query(command.args or "", REGIONS)
+
+    if not query:
+        await message.answer(text=TEXTS["search_help"])
+        return
+
+    # Поиск идет только по каталогу в памяти, без запросов к API
+    results = package_search.search(
+        region=query.region,
+        min_volume=query.min_volume,
+        min_days=query.min_days,
+        max_price=query.max_price,
+        limit=SEARCH_RESULTS_LIMIT
+    )
+
+    if not results:
+        await message.answer(
+            text=TEXTS["search_nothing_found"],
+            reply_markup=get_buy_esim_keyboard()
+        )
+        return
+
+    await state.clear()
+    await message.answer(
+        text=TEXTS["search_results"],
+        reply_markup=get_search_results_keyboard(
+            [(country_index.name(country_code), package) for country_code, package in results]
+        )
+    )
+
+
+@callbacks.prefix(FoundPackageCallback)
+async def select_found_package(callback: CallbackQuery, state: FSMContext, callback_data: FoundPackageCallback):
+    """Выбор тарифа из результатов поиска"""
+    package_code = callback_data.code
+    country_code = catalog_cache.country_of(package_code)
+    package = catalog_cache.locate(package_code)
+
+    if package is None or country_code is None:
+        # Каталог страны успел обновиться или вытесниться из кэша
+        await callback.message.edit_text(
+            text="Ошибка: выбранный тариф не найден. Попробуйте снова.",
+            reply_markup=get_back_to_main_keyboard()
+        )
+        await callback.answer()
+        return
+
+    await show_confirmation(callback.message, state, country_index.name(country_code), country_code, package)
+    await callback.answer()
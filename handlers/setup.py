@@ -1,14 +1,12 @@
 # handlers/setup.py
 
-from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from keyboards.inline import get_feedback_keyboard
 from config import TEXTS
+from handlers.callbacks import callbacks
 
-router = Router()
 
-
-@router.callback_query(F.data == "setup")
+@callbacks.exact("setup")
 async def show_setup(callback: CallbackQuery):
     """Показать инструкцию по установке eSIM"""
     await callback.message.edit_text(
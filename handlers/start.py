@@ -1,10 +1,11 @@
 # handlers/start.py
 
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, FSInputFile
 from keyboards.inline import get_start_keyboard
 from config import TEXTS
+from handlers.callbacks import callbacks
 
 router = Router()
 
@@ -19,7 +20,7 @@ async def cmd_start(message: Message):
     )
 
 
-@router.callback_query(F.data == "back_to_main")
+@callbacks.exact("back_to_main")
 async def back_to_main(callback: CallbackQuery):
     """Возврат к главному меню"""
     # Проверяем, является ли текущее сообщение изображением
@@ -37,4 +38,10 @@ async def back_to_main(callback: CallbackQuery):
             reply_markup=get_start_keyboard()
         )
 
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+
+@router.callback_query()
+async def stale_callback(callback: CallbackQuery):
+    """Кнопка, для которой не нашлось обработчика (например, из старого сообщения)"""
+    await callback.answer(TEXTS["stale_button"])
\ No newline at end of file
@@ -0,0 +1,77 @@
+# keyboards/callback_data.py
+
+from config import REGIONS, QA_ITEMS
+from utils.callback_data import CallbackData
+
+# Короткие ID регионов и вопросов - позиция в config.REGIONS и config.QA_ITEMS
+REGION_KEYS = tuple(REGIONS)
+QA_KEYS = tuple(QA_ITEMS)
+
+
+class RegionCallback(CallbackData, prefix="r"):
+    """Выбор региона: номер в REGION_KEYS"""
+    __slots__ = ("region",)
+    region: int
+
+    @property
+    def key(self) -> str:
+        """Ключ региона в REGIONS (пустая строка для неизвестного номера)"""
+        return REGION_KEYS[self.region] if 0 <= self.region < len(REGION_KEYS) else ""
+
+    @classmethod
+    def of(cls, region_key: str) -> "RegionCallback":
+        return cls(region=REGION_KEYS.index(region_key))
+
+
+class CountryCallback(CallbackData, prefix="c"):
+    """Выбор страны: ISO-код"""
+    __slots__ = ("country",)
+    country: str
+
+
+class PackageCallback(CallbackData, prefix="p"):
+    """Выбор тарифа: номер в каталоге страны"""
+    __slots__ = ("index",)
+    index: int
+
+
+class FoundPackageCallback(CallbackData, prefix="f"):
+    """Выбор тарифа из поиска: packageCode"""
+    __slots__ = ("code",)
+    code: str
+
+
+class ProfilePageCallback(CallbackData, prefix="pg"):
+    """Страница профиля: курсор (ID заказа) и направление"""
+    __slots__ = ("cursor", "older")
+    cursor: int
+    older: bool
+
+
+class ESIMCallback(CallbackData, prefix="e"):
+    """Детали eSIM: ID заказа"""
+    __slots__ = ("order_id",)
+    order_id: int
+
+
+class ActivateESIMCallback(CallbackData, prefix="a"):
+    """Активация eSIM: ID заказа"""
+    __slots__ = ("order_id",)
+    order_id: int
+
+
+class QuestionCallback(CallbackData, prefix="q"):
+    """Ответ на вопрос: номер в QA_KEYS"""
+    __slots__ = ("item",)
+    item: int
+
+    @property
+    def key(self) -> str:
+        """Ключ вопроса в QA_ITEMS (пустая строка для неизвестного номера)"""
+        return QA_KEYS[self.item] if 0 <= self.item < len(QA_KEYS) else ""
+
+
+class FeedbackCallback(CallbackData, prefix="fb"):
+    """Нашел ли пользователь ответ"""
+    __slots__ = ("helpful",)
+    helpful: bool
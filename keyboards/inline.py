@@ -2,9 +2,88 @@
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Dict, Any
+from pydantic import ConfigDict
+from typing import Callable, Dict, List, Tuple
+from functools import wraps
+from config import QA_ITEMS, COUNTRY_CODES
+from keyboards.callback_data import (
+    RegionCallback,
+    CountryCallback,
+    PackageCallback,
+    FoundPackageCallback,
+    QuestionCallback,
+    FeedbackCallback
+)
+from utils.packages import PackageTable, PackageView
 
+# Реестр статических клавиатур: строятся один раз при импорте модуля
+STATIC_KEYBOARDS: Dict[str, InlineKeyboardMarkup] = {}
 
+
+class FrozenRows(list):
+    """
+    Список рядов (или кнопок ряда), который нельзя изменить
+
+    Остается списком, чтобы aiogram сериализовал разметку как обычную.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Статическую клавиатуру нельзя изменять")
+
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+
+class FrozenInlineKeyboardButton(InlineKeyboardButton):
+    """Кнопка статической клавиатуры: поля нельзя переприсвоить"""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """Разметка статической клавиатуры: ни поля, ни ряды нельзя изменить"""
+
+    model_config = ConfigDict(frozen=True)
+
+
+def freeze_keyboard(markup: InlineKeyboardMarkup) -> FrozenInlineKeyboardMarkup:
+    """
+    Неизменяемая копия разметки
+
+    InlineKeyboardMarkup и InlineKeyboardButton в aiogram изменяемые, поэтому
+    общий экземпляр без заморозки можно испортить из любого обработчика.
+    """
+    return FrozenInlineKeyboardMarkup.model_construct(
+        inline_keyboard=FrozenRows(
+            FrozenRows(
+                FrozenInlineKeyboardButton.model_construct(button.model_fields_set, **dict(button))
+                for button in row
+            )
+            for row in markup.inline_keyboard
+        )
+    )
+
+
+def static_keyboard(func: Callable[[], InlineKeyboardMarkup]) -> Callable[[], InlineKeyboardMarkup]:
+    """
+    Строит клавиатуру без параметров один раз и регистрирует её в реестре
+
+    Разметка замораживается (см. freeze_keyboard), поэтому один экземпляр
+    безопасно отдавать во все обработчики.
+    """
+    markup = freeze_keyboard(func())
+    STATIC_KEYBOARDS[func.__name__] = markup
+
+    @wraps(func)
+    def wrapper() -> InlineKeyboardMarkup:
+        return markup
+
+    # Исходная функция сборки - для бенчмарков и пересборки
+    wrapper.build = func
+    return wrapper
+
+
+@static_keyboard
 def get_start_keyboard():
     """Клавиатура для стартового меню"""
     builder = InlineKeyboardBuilder()
@@ -24,30 +103,31 @@ def get_start_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_buy_esim_keyboard():
     """Клавиатура для выбора региона"""
     builder = InlineKeyboardBuilder()
 
     builder.row(
-        InlineKeyboardButton(text="🐼 Азия", callback_data="region_asia")
+        InlineKeyboardButton(text="🐼 Азия", callback_data=RegionCallback.of("asia").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🐪 Ближний восток", callback_data="region_middle_east")
+        InlineKeyboardButton(text="🐪 Ближний восток", callback_data=RegionCallback.of("middle_east").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🐌 Европа", callback_data="region_europe")
+        InlineKeyboardButton(text="🐌 Европа", callback_data=RegionCallback.of("europe").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🦅 Америка", callback_data="region_americas")
+        InlineKeyboardButton(text="🦅 Америка", callback_data=RegionCallback.of("americas").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🐻 СНГ", callback_data="region_cis")
+        InlineKeyboardButton(text="🐻 СНГ", callback_data=RegionCallback.of("cis").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🦁 Африка", callback_data="region_africa")
+        InlineKeyboardButton(text="🦁 Африка", callback_data=RegionCallback.of("africa").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🐨 Океания", callback_data="region_oceania")
+        InlineKeyboardButton(text="🐨 Океания", callback_data=RegionCallback.of("oceania").pack())
     )
     builder.row(
         InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main")
@@ -62,7 +142,7 @@ def get_countries_keyboard(region, countries):
 
     for country in countries:
         builder.row(
-            InlineKeyboardButton(text=country, callback_data=f"country_{country}")
+            InlineKeyboardButton(text=country, callback_data=CountryCallback(country=COUNTRY_CODES[country]).pack())
         )
 
     builder.row(
@@ -72,43 +152,36 @@ def get_countries_keyboard(region, countries):
     return builder.as_markup()
 
 
-def format_package_button_text(package: Dict[str, Any]) -> str:
-    """Форматирует текст кнопки для пакета"""
-    package_name = package.get("name", "Неизвестный тариф")
-    volume_bytes = package.get("volume", 0)
-    duration = package.get("duration", 0)
-    duration_unit = package.get("durationUnit", "DAY")
-    price = package.get("price", 0) / 10000  # Преобразование в доллары
+def get_packages_keyboard(packages: PackageTable, country_code: str):
+    """Клавиатура с пакетами для выбранной страны"""
+    builder = InlineKeyboardBuilder()
 
-    # Преобразование байтов в МБ или ГБ
-    if volume_bytes >= 1073741824:  # 1 ГБ
-        volume_str = f"{volume_bytes / 1073741824:.1f} ГБ"
-    else:
-        volume_str = f"{volume_bytes / 1048576:.0f} МБ"
+    for i, package in enumerate(packages):
+        builder.row(
+            InlineKeyboardButton(text=package.button_text, callback_data=PackageCallback(index=i).pack())
+        )
 
-    # Форматирование срока действия
-    if duration_unit == "DAY":
-        duration_str = f"{duration} дней"
-    elif duration_unit == "MONTH":
-        duration_str = f"{duration} месяцев"
-    else:
-        duration_str = f"{duration} {duration_unit}"
+    builder.row(
+        InlineKeyboardButton(text="⬅️ Назад", callback_data=f"buy_esim")
+    )
 
-    return f"{package_name} ({volume_str}, {duration_str}) - ${price:.2f}"
+    return builder.as_markup()
 
 
-def get_packages_keyboard(packages: List[Dict[str, Any]], country_code: str):
-    """Клавиатура с пакетами для выбранной страны"""
+def get_search_results_keyboard(results: List[Tuple[str, PackageView]]):
+    """Клавиатура с результатами поиска тарифов (название страны, тариф)"""
     builder = InlineKeyboardBuilder()
 
-    for i, package in enumerate(packages):
-        button_text = format_package_button_text(package)
+    for country_name, package in results:
         builder.row(
-            InlineKeyboardButton(text=button_text, callback_data=f"package_{i}")
+            InlineKeyboardButton(
+                text=f"{country_name}: {package.button_text}",
+                callback_data=FoundPackageCallback(code=package.code).pack()
+            )
         )
 
     builder.row(
-        InlineKeyboardButton(text="⬅️ Назад", callback_data=f"buy_esim")
+        InlineKeyboardButton(text="⬅️ В главное меню", callback_data="back_to_main")
     )
 
     return builder.as_markup()
@@ -122,7 +195,7 @@ def get_confirm_keyboard(country_code: str):
         InlineKeyboardButton(text="✅ Подтвердить и оплатить", callback_data="confirm_purchase")
     )
     builder.row(
-        InlineKeyboardButton(text="⬅️ Назад к тарифам", callback_data=f"country_{country_code}")
+        InlineKeyboardButton(text="⬅️ Назад к тарифам", callback_data=CountryCallback(country=country_code).pack())
     )
     builder.row(
         InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_purchase")
@@ -131,6 +204,7 @@ def get_confirm_keyboard(country_code: str):
     return builder.as_markup()
 
 
+@static_keyboard
 def get_payment_done_keyboard():
     """Клавиатура после завершения платежа"""
     builder = InlineKeyboardBuilder()
@@ -153,6 +227,7 @@ def get_back_to_countries_keyboard(region_data: str):
     return builder.as_markup()
 
 
+@static_keyboard
 def get_profile_keyboard():
     """Клавиатура для профиля"""
     builder = InlineKeyboardBuilder()
@@ -164,6 +239,7 @@ def get_profile_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_setup_keyboard():
     """Клавиатура для установки eSIM"""
     builder = InlineKeyboardBuilder()
@@ -175,49 +251,16 @@ def get_setup_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_questions_keyboard():
     """Клавиатура для раздела вопросов"""
     builder = InlineKeyboardBuilder()
 
-    builder.row(
-        InlineKeyboardButton(text="Что такое eSIM?", callback_data="qa_what_is_esim")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Как подключить интернет?", callback_data="qa_how_to_connect")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Какой пакет мне выбрать?", callback_data="qa_which_package")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Можно ли звонить и писать SMS?", callback_data="qa_can_call_sms")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Мой телефон поддерживает eSIM?", callback_data="qa_phone_support")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Когда стартует тариф?", callback_data="qa_when_starts")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Как продлить eSIM?", callback_data="qa_how_extend")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Можно ли вернуть деньги?", callback_data="qa_refund")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Насколько безопасна eSIM?", callback_data="qa_is_safe")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Можно ли раздавать интернет?", callback_data="qa_share_internet")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Работают ли WhatsApp и Telegram?", callback_data="qa_messengers_work")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Чем eSIM лучше роуминга?", callback_data="qa_better_than_roaming")
-    )
-    builder.row(
-        InlineKeyboardButton(text="Почему интернет бывает медленным?", callback_data="qa_slow_internet")
-    )
+    for item, qa_item in enumerate(QA_ITEMS.values()):
+        builder.row(
+            InlineKeyboardButton(text=qa_item["text"], callback_data=QuestionCallback(item=item).pack())
+        )
+
     builder.row(
         InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main")
     )
@@ -225,6 +268,7 @@ def get_questions_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_qa_back_keyboard():
     """Клавиатура возврата к вопросам"""
     builder = InlineKeyboardBuilder()
@@ -236,6 +280,22 @@ def get_qa_back_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
+def get_esim_delayed_keyboard():
+    """Клавиатура для заказа, eSIM по которому выпускается дольше обычного"""
+    builder = InlineKeyboardBuilder()
+
+    builder.row(
+        InlineKeyboardButton(text="👤 Профиль", callback_data="profile")
+    )
+    builder.row(
+        InlineKeyboardButton(text="Написать в поддержку", callback_data="support")
+    )
+
+    return builder.as_markup()
+
+
+@static_keyboard
 def get_back_to_main_keyboard():
     """Клавиатура возврата к главному меню"""
     builder = InlineKeyboardBuilder()
@@ -247,6 +307,7 @@ def get_back_to_main_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_partner_keyboard():
     """Клавиатура для выбора типа партнерства"""
     builder = InlineKeyboardBuilder()
@@ -264,6 +325,7 @@ def get_partner_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_partner_referral_keyboard():
     """Клавиатура для партнерской программы"""
     builder = InlineKeyboardBuilder()
@@ -278,6 +340,7 @@ def get_partner_referral_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_partner_community_keyboard():
     """Клавиатура для монетизации сообщества"""
     builder = InlineKeyboardBuilder()
@@ -292,18 +355,20 @@ def get_partner_community_keyboard():
     return builder.as_markup()
 
 
+@static_keyboard
 def get_feedback_keyboard():
     """Клавиатура для обратной связи"""
     builder = InlineKeyboardBuilder()
 
     builder.row(
-        InlineKeyboardButton(text="👍 Да", callback_data="feedback_yes"),
-        InlineKeyboardButton(text="😕 Нет", callback_data="feedback_no")
+        InlineKeyboardButton(text="👍 Да", callback_data=FeedbackCallback(helpful=True).pack()),
+        InlineKeyboardButton(text="😕 Нет", callback_data=FeedbackCallback(helpful=False).pack())
     )
 
     return builder.as_markup()
 
 
+@static_keyboard
 def get_feedback_no_keyboard():
     """Клавиатура для отрицательной обратной связи"""
     builder = InlineKeyboardBuilder()
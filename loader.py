@@ -0,0 +1,116 @@
+# loader.py
+
+from config import (
+    ESIM_ACCESS_CODE,
+    ESIM_API_TIMEOUT,
+    ESIM_API_CONCURRENCY,
+    ESIM_API_ENDPOINT_TIMEOUTS,
+    ESIM_API_RETRIES,
+    ESIM_API_RETRY_BASE_DELAY,
+    ESIM_API_RETRY_MAX_DELAY,
+    ESIM_API_BREAKER_THRESHOLD,
+    ESIM_API_BREAKER_RECOVERY,
+    METRICS_HOST,
+    METRICS_PORT,
+    METRICS_PATH,
+    CATALOG_CACHE_TTL,
+    CATALOG_CACHE_MAX_SIZE,
+    CATALOG_WARMUP_CONCURRENCY,
+    CATALOG_WARMUP_INTERVAL,
+    CATALOG_WARMUP_READY_RATIO,
+    CATALOG_WARMUP_RETRY_INTERVAL,
+    ESIM_STATUS_TTL,
+    PROVISIONING_INITIAL_DELAY,
+    PROVISIONING_MAX_DELAY,
+    PROVISIONING_MAX_AGE,
+    COUNTRY_CODES,
+    COUNTRY_ALIASES,
+    REGIONS,
+    PHOTO_CACHE_PATH,
+    ORDER_DB_PATH
+)
+from utils.catalog_cache import CatalogCache
+from utils.catalog_warmer import CatalogWarmer
+from utils.circuit_breaker import CircuitBreaker
+from utils.country_index import CountryIndex
+from utils.esim_client import ESIMAccessClient
+from utils.metrics import MetricsRegistry, MetricsServer
+from utils.order_store import OrderStore
+from utils.package_search import PackageSearch
+from utils.photo_cache import PhotoCache
+from utils.provisioning import ProvisioningPoller
+from utils.status_cache import ESIMStatusCache
+
+# Метрики приложения и локальный сервер для их выдачи
+metrics = MetricsRegistry()
+metrics_server = MetricsServer(metrics, host=METRICS_HOST, port=METRICS_PORT, path=METRICS_PATH)
+
+# Общий экземпляр клиента eSIM Access для всех обработчиков
+esim_client = ESIMAccessClient(
+    ESIM_ACCESS_CODE,
+    timeout=ESIM_API_TIMEOUT,
+    max_concurrency=ESIM_API_CONCURRENCY,
+    endpoint_timeouts=ESIM_API_ENDPOINT_TIMEOUTS,
+    retries=ESIM_API_RETRIES,
+    retry_base_delay=ESIM_API_RETRY_BASE_DELAY,
+    retry_max_delay=ESIM_API_RETRY_MAX_DELAY,
+    breaker=CircuitBreaker(
+        failure_threshold=ESIM_API_BREAKER_THRESHOLD,
+        recovery_timeout=ESIM_API_BREAKER_RECOVERY,
+        name="eSIM Access"
+    ),
+    metrics=metrics
+)
+
+# Кэш каталога тарифов перед get_packages_by_country
+catalog_cache = CatalogCache(
+    esim_client.get_packages_by_country,
+    ttl=CATALOG_CACHE_TTL,
+    max_size=CATALOG_CACHE_MAX_SIZE
+)
+
+
+def _warmup_country_codes():
+    """Все различные коды стран из COUNTRY_CODES и REGIONS"""
+    codes = list(COUNTRY_CODES.values())
+    for region in REGIONS.values():
+        codes.extend(
+            COUNTRY_CODES[country] for country in region["countries"] if country in COUNTRY_CODES
+        )
+    return codes
+
+
+# Фоновый прогрев каталога для всех стран
+catalog_warmer = CatalogWarmer(
+    catalog_cache,
+    _warmup_country_codes(),
+    concurrency=CATALOG_WARMUP_CONCURRENCY,
+    interval=CATALOG_WARMUP_INTERVAL,
+    min_ready=CATALOG_WARMUP_READY_RATIO,
+    retry_interval=CATALOG_WARMUP_RETRY_INTERVAL,
+    metrics=metrics
+)
+
+# Поиск страны по введенному тексту (названия, опечатки, ISO-коды)
+country_index = CountryIndex(COUNTRY_CODES, COUNTRY_ALIASES)
+
+# Поиск тарифов по всем странам в кэше каталога
+package_search = PackageSearch(catalog_cache, REGIONS, COUNTRY_CODES)
+
+# Кэш file_id картинок регионов
+photo_cache = PhotoCache(PHOTO_CACHE_PATH)
+
+# Хранилище заказов пользователей
+order_store = OrderStore(ORDER_DB_PATH)
+
+# Фоновое ожидание выпуска eSIM по оплаченным заказам
+provisioning_poller = ProvisioningPoller(
+    esim_client,
+    initial_delay=PROVISIONING_INITIAL_DELAY,
+    max_delay=PROVISIONING_MAX_DELAY,
+    max_age=PROVISIONING_MAX_AGE,
+    store=order_store
+)
+
+# Кэш профилей и статусов eSIM по номеру заказа
+esim_status_cache = ESIMStatusCache(esim_client, ttl=ESIM_STATUS_TTL)
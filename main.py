@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import secrets
 import sys
 
 from aiogram import Bot, Dispatcher
@@ -9,8 +10,34 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import BOT_TOKEN
-from handlers import setup_routers
+from config import (
+    BOT_TOKEN,
+    REGIONS,
+    IMAGE_CACHE_DIR,
+    FSM_STORAGE,
+    FSM_DB_PATH,
+    BOT_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_MAX_IN_FLIGHT,
+    WEBHOOK_MAX_CONNECTIONS,
+    METRICS_ENABLED,
+    THROTTLE_USER_RATE,
+    THROTTLE_USER_BURST,
+    THROTTLE_GLOBAL_RATE,
+    THROTTLE_GLOBAL_BURST,
+    THROTTLE_IDLE_TTL,
+    TEXTS
+)
+from handlers import setup_routers, callbacks
+from loader import esim_client, catalog_warmer, order_store, provisioning_poller, metrics_server
+from utils.fsm_storage import SQLiteStorage
+from utils.image_optimizer import optimize_region_images
+from utils.throttling import ThrottlingMiddleware
+from utils.webhook import setup_webhook, run_webhook
 
 
 async def main():
@@ -22,8 +49,14 @@ async def main():
         stream=sys.stdout
     )
 
+    # Подготовка уменьшенных картинок регионов для Telegram
+    await asyncio.to_thread(optimize_region_images, REGIONS, IMAGE_CACHE_DIR)
+
     # Инициализация хранилища состояний
-    storage = MemoryStorage()
+    if FSM_STORAGE == "sqlite":
+        storage = SQLiteStorage(FSM_DB_PATH)
+    else:
+        storage = MemoryStorage()
 
     # Инициализация бота
     bot = Bot(
@@ -38,6 +71,66 @@ async def main():
     router = setup_routers()
     dp.include_router(router)
 
+    # Ограничение частоты запросов (после выбора обработчика, до его вызова)
+    throttling = ThrottlingMiddleware(
+        user_rate=THROTTLE_USER_RATE,
+        user_burst=THROTTLE_USER_BURST,
+        global_rate=THROTTLE_GLOBAL_RATE,
+        global_burst=THROTTLE_GLOBAL_BURST,
+        idle_ttl=THROTTLE_IDLE_TTL,
+        notice=TEXTS["throttled"]
+    )
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+
+    # Прогрев каталога тарифов в фоне
+    dp.startup.register(catalog_warmer.start)
+    dp.shutdown.register(catalog_warmer.stop)
+
+    # Фоновое ожидание выпуска оплаченных eSIM
+    dp.startup.register(provisioning_poller.start)
+    dp.shutdown.register(provisioning_poller.stop)
+
+    # Метрики запросов к eSIM Access для Prometheus
+    if METRICS_ENABLED:
+        dp.startup.register(metrics_server.start)
+        dp.shutdown.register(metrics_server.stop)
+
+    # Закрываем пул соединений к eSIM Access при остановке
+    dp.shutdown.register(esim_client.close)
+
+    # Сохраняем накопленные заказы и закрываем базу при остановке
+    dp.shutdown.register(order_store.close)
+
+    # Время обработки callback-запросов по маршрутам
+    dp.shutdown.register(callbacks.log_stats)
+
+    # Режим вебхука, если он настроен и Telegram принял URL
+    if BOT_MODE == "webhook":
+        # Без секрета поддельные обновления мог бы прислать кто угодно
+        # Секрет передается Telegram при каждом запуске, поэтому его можно сгенерировать
+        webhook_secret = WEBHOOK_SECRET
+        if not webhook_secret:
+            webhook_secret = secrets.token_urlsafe(32)
+            logging.warning("WEBHOOK_SECRET не задан, используется случайный секрет")
+
+        if not WEBHOOK_URL:
+            logging.error("WEBHOOK_URL не задан, используется long-polling")
+        elif await setup_webhook(bot, dp, WEBHOOK_URL, webhook_secret, WEBHOOK_MAX_CONNECTIONS):
+            logging.info("Бот запущен в режиме вебхука!")
+            await run_webhook(
+                bot,
+                dp,
+                host=WEBHOOK_HOST,
+                port=WEBHOOK_PORT,
+                path=WEBHOOK_PATH,
+                secret_token=webhook_secret,
+                max_in_flight=WEBHOOK_MAX_IN_FLIGHT
+            )
+            return
+        else:
+            logging.error("Не удалось включить вебхук, используется long-polling")
+
     # Удаление вебхука и очистка обновлений
     await bot.delete_webhook(drop_pending_updates=True)
 
@@ -0,0 +1,102 @@
+# tests/test_buying.py
+
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import TEXTS
+from handlers import buying
+from handlers.buying import BuyingStates
+from keyboards.callback_data import PackageCallback
+from utils.catalog_cache import CatalogCache
+
+
+def make_package(price: int) -> dict:
+    return {
+        "packageCode": "TR-1",
+        "name": "Turkey 1GB",
+        "volume": 1073741824,
+        "duration": 7,
+        "durationUnit": "DAY",
+        "price": price
+    }
+
+
+class FakeMessage:
+    def __init__(self):
+        self.chat = SimpleNamespace(id=1)
+        self.photo = None
+        self.texts = []
+
+    async def edit_text(self, text: str, **kwargs):
+        self.texts.append(text)
+        return self
+
+
+class FakeCallback:
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=1)
+        self.message = FakeMessage()
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+
+def run_purchase(monkeypatch, reprice: bool):
+    """Пользователь выбирает тариф за $1.50, затем нажимает "Подтвердить" (дважды, если попросят)"""
+    catalog = {"TR": [make_package(15000)]}
+
+    async def fetcher(country_code):
+        return catalog[country_code]
+
+    orders = []
+
+    async def order_profile(package_code, price, count=1):
+        orders.append((package_code, price))
+        # Дальше заказ не нужен: проверяем только, по какой цене он оформлен
+        return None
+
+    cache = CatalogCache(fetcher)
+    monkeypatch.setattr(buying, "catalog_cache", cache)
+    monkeypatch.setattr(buying.esim_client, "order_profile", order_profile)
+
+    async def scenario():
+        state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=1, user_id=1))
+        await cache.get("TR")
+        await state.update_data(country_name="Турция", country_code="TR", catalog_version=cache.version("TR"))
+        await state.set_state(BuyingStates.selecting_package)
+
+        callback = FakeCallback()
+        await buying.select_package(callback, state, PackageCallback(index=0))
+
+        if reprice:
+            # Каталог обновился, пока пользователь читал подтверждение
+            catalog["TR"] = [make_package(25000)]
+            await cache.refresh("TR")
+
+        await buying.process_payment(callback, state)
+        if not orders:
+            await buying.process_payment(callback, state)
+        return callback.message.texts
+
+    return asyncio.run(scenario()), orders
+
+
+def test_order_uses_confirmed_catalog(monkeypatch):
+    texts, orders = run_purchase(monkeypatch, reprice=False)
+
+    assert orders == [("TR-1", 15000)]
+    assert "$1.50" in texts[0]
+
+
+def test_repriced_catalog_requires_new_confirmation(monkeypatch):
+    texts, orders = run_purchase(monkeypatch, reprice=True)
+
+    # Первое нажатие не заказывает, а показывает новую цену
+    confirmations = [text for text in texts if text.startswith(TEXTS["catalog_changed"])]
+    assert len(confirmations) == 1
+    assert "$2.50" in confirmations[0]
+    assert orders == [("TR-1", 25000)]
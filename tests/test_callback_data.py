@@ -0,0 +1,126 @@
+# tests/test_callback_data.py
+
+import pytest
+
+from config import COUNTRY_CODES
+from keyboards.callback_data import (
+    REGION_KEYS,
+    QA_KEYS,
+    RegionCallback,
+    CountryCallback,
+    PackageCallback,
+    FoundPackageCallback,
+    ProfilePageCallback,
+    ESIMCallback,
+    ActivateESIMCallback,
+    QuestionCallback,
+    FeedbackCallback
+)
+from utils.callback_data import MAX_CALLBACK_BYTES, CallbackData
+
+SAMPLES = [
+    *(RegionCallback(region=index) for index in range(len(REGION_KEYS))),
+    *(CountryCallback(country=code) for code in dict.fromkeys(COUNTRY_CODES.values())),
+    PackageCallback(index=0),
+    PackageCallback(index=499),
+    FoundPackageCallback(code="CKH491"),
+    FoundPackageCallback(code="P6ZPQK3RL:ALT"),
+    ProfilePageCallback(cursor=1, older=True),
+    ProfilePageCallback(cursor=2 ** 62, older=False),
+    ESIMCallback(order_id=123456789),
+    ActivateESIMCallback(order_id=7),
+    *(QuestionCallback(item=index) for index in range(len(QA_KEYS))),
+    FeedbackCallback(helpful=True),
+    FeedbackCallback(helpful=False),
+]
+
+# Кнопки бота (без классов, объявленных в тестах)
+BUTTON_TYPES = {
+    codec for codec in CallbackData.__subclasses__() if codec.__module__ == "keyboards.callback_data"
+}
+
+INVALID = [
+    (PackageCallback, "abc"),
+    (PackageCallback, ""),
+    (PackageCallback, " 1"),
+    (PackageCallback, "1_0"),
+    (ProfilePageCallback, "5"),
+    (ProfilePageCallback, "5:2"),
+    (ProfilePageCallback, "x:1"),
+    (FeedbackCallback, "yes"),
+    (ESIMCallback, "1:2"),
+]
+
+
+@pytest.mark.parametrize("sample", SAMPLES, ids=repr)
+def test_round_trip(sample):
+    data = sample.pack()
+
+    assert len(data.encode("utf-8")) <= MAX_CALLBACK_BYTES
+    assert data.startswith(type(sample).prefix + ":")
+    assert type(sample).parse(data) == sample
+
+
+def test_every_button_type_is_covered():
+    types = {type(sample) for sample in SAMPLES}
+
+    assert types == BUTTON_TYPES
+
+
+def test_prefixes_are_unique():
+    prefixes = [codec.prefix for codec in BUTTON_TYPES]
+
+    assert len(prefixes) == len(set(prefixes))
+
+
+@pytest.mark.parametrize(("codec", "payload"), INVALID, ids=repr)
+def test_invalid_payload_is_rejected(codec, payload):
+    with pytest.raises(ValueError):
+        codec.unpack(payload)
+
+
+def test_parse_rejects_foreign_prefix():
+    with pytest.raises(ValueError):
+        PackageCallback.parse(ESIMCallback(order_id=1).pack())
+
+    with pytest.raises(ValueError):
+        PackageCallback.parse("p")
+
+
+def test_region_key_with_separator_survives():
+    data = RegionCallback.of("middle_east").pack()
+
+    assert RegionCallback.parse(data).key == "middle_east"
+
+
+def test_unknown_index_has_empty_key():
+    assert RegionCallback(region=len(REGION_KEYS)).key == ""
+    assert QuestionCallback(item=-1).key == ""
+
+
+def test_pack_enforces_byte_limit():
+    prefix_length = len(FoundPackageCallback.prefix) + 1
+    fits = FoundPackageCallback(code="x" * (MAX_CALLBACK_BYTES - prefix_length))
+
+    assert len(fits.pack()) == MAX_CALLBACK_BYTES
+    with pytest.raises(ValueError):
+        FoundPackageCallback(code="x" * (MAX_CALLBACK_BYTES - prefix_length + 1)).pack()
+    with pytest.raises(ValueError):
+        # Лимит в байтах, а не в символах
+        FoundPackageCallback(code="ж" * (MAX_CALLBACK_BYTES // 2)).pack()
+
+
+def test_separator_only_allowed_in_last_field():
+    class Pair(CallbackData, prefix="test_pair"):
+        __slots__ = ("first", "second")
+        first: str
+        second: str
+
+    assert Pair.parse(Pair(first="a", second="b:c").pack()) == Pair(first="a", second="b:c")
+    with pytest.raises(ValueError):
+        Pair(first="a:b", second="c").pack()
+
+
+def test_missing_fields_are_rejected():
+    with pytest.raises(TypeError):
+        ProfilePageCallback(cursor=1)
@@ -0,0 +1,89 @@
+# tests/test_catalog_warmer.py
+
+import asyncio
+
+from utils.catalog_cache import CatalogCache
+from utils.catalog_warmer import CatalogWarmer
+from utils.esim_client import ESIMAccessError
+from utils.metrics import MetricsRegistry
+
+COUNTRIES = ["TR", "DE", "TH", "TH", "US", "JP"]
+PACKAGE = {"packageCode": "P-1", "name": "1GB", "volume": 1073741824, "duration": 7, "durationUnit": "DAY", "price": 15000}
+
+
+class FlakyAPI:
+    """API, недоступный для стран из down"""
+
+    def __init__(self, down):
+        self.down = set(down)
+        self.calls = []
+
+    async def fetch(self, country_code):
+        self.calls.append(country_code)
+        if country_code in self.down:
+            raise ESIMAccessError(f"{country_code}: недоступен")
+        return [dict(PACKAGE, packageCode=f"{country_code}-1")]
+
+
+async def wait_ready(warmer, timeout=1.0):
+    try:
+        await asyncio.wait_for(warmer.ready.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+def test_not_ready_while_upstream_is_down():
+    api = FlakyAPI(down=COUNTRIES)
+    metrics = MetricsRegistry()
+    warmer = CatalogWarmer(CatalogCache(api.fetch), COUNTRIES, retry_interval=0.01, metrics=metrics)
+
+    async def scenario():
+        await warmer.start()
+        await wait_ready(warmer, timeout=0.1)
+        ready = warmer.is_ready
+
+        # API восстановился: недостающие страны догружаются повтором
+        api.down.clear()
+        await wait_ready(warmer)
+        await warmer.stop()
+        return ready
+
+    assert asyncio.run(scenario()) is False
+    assert warmer.is_ready
+    assert "esim_catalog_ready 1.0" in metrics.render()
+    assert "esim_catalog_countries 5.0" in metrics.render()
+
+
+def test_ready_at_threshold_and_retries_only_missing():
+    # 4 из 5 стран - ровно 80%
+    api = FlakyAPI(down={"JP"})
+    warmer = CatalogWarmer(CatalogCache(api.fetch), COUNTRIES, retry_interval=0.01)
+
+    async def scenario():
+        await warmer.start()
+        await wait_ready(warmer)
+        await warmer.stop()
+
+    asyncio.run(scenario())
+
+    assert warmer.is_ready
+    assert warmer.cached_countries() == 4
+    # Алиасы одной страны загружаются один раз
+    assert sorted(api.calls) == ["DE", "JP", "TH", "TR", "US"]
+
+
+def test_below_threshold_retries_missing_countries():
+    api = FlakyAPI(down={"JP", "US"})
+    warmer = CatalogWarmer(CatalogCache(api.fetch), COUNTRIES, retry_interval=0.01)
+
+    async def scenario():
+        await warmer.start()
+        await wait_ready(warmer, timeout=0.1)
+        await warmer.stop()
+
+    asyncio.run(scenario())
+
+    assert not warmer.is_ready
+    # Повторяются только страны, которых нет в кэше
+    assert api.calls.count("TR") == 1
+    assert api.calls.count("JP") > 1
@@ -0,0 +1,146 @@
+# tests/test_esim_client.py
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from utils.catalog_cache import CatalogCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.esim_client import ESIMAccessClient, ESIMAccessError
+
+PACKAGE = {
+    "packageCode": "TR-1",
+    "name": "Turkey 1GB",
+    "volume": 1073741824,
+    "duration": 7,
+    "durationUnit": "DAY",
+    "price": 15000
+}
+
+
+class FakeAPI:
+    """Локальный сервер eSIM Access: первые failures запросов получают status"""
+
+    def __init__(self, failures: int = 0, status: int = 503, success: bool = True):
+        self.failures = failures
+        self.status = status
+        self.success = success
+        self.calls = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        if self.failures > 0:
+            self.failures -= 1
+            return web.Response(status=self.status)
+        return web.json_response({
+            "success": self.success,
+            "errorMsg": None if self.success else "error",
+            "obj": {"packageList": [PACKAGE], "orderNo": "B1", "esimList": []}
+        })
+
+
+async def run_with_client(api: FakeAPI, scenario, threshold: int = 5):
+    app = web.Application()
+    app.router.add_post("/{path:.*}", api.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = ESIMAccessClient(
+        "test",
+        retries=2,
+        retry_base_delay=0.001,
+        retry_max_delay=0.001,
+        breaker=CircuitBreaker(failure_threshold=threshold, recovery_timeout=60)
+    )
+    client.base_url = f"http://127.0.0.1:{port}"
+    try:
+        return await scenario(client)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_transient_errors_are_retried():
+    api = FakeAPI(failures=2)
+
+    packages = asyncio.run(run_with_client(api, lambda client: client.get_packages_by_country("TR")))
+
+    assert [package["packageCode"] for package in packages] == ["TR-1"]
+    assert api.calls == 3
+
+
+def test_exhausted_retries_raise_instead_of_empty_catalog():
+    api = FakeAPI(failures=10)
+
+    async def scenario(client):
+        with pytest.raises(ESIMAccessError):
+            await client.get_packages_by_country("TR")
+        return client.breaker.state
+
+    # Выключатель еще замкнут, но сбой все равно отличается от пустого каталога
+    assert asyncio.run(run_with_client(api, scenario)) == CircuitBreaker.CLOSED
+    assert api.calls == 3
+
+
+def test_api_error_is_empty_result():
+    api = FakeAPI(success=False)
+
+    packages = asyncio.run(run_with_client(api, lambda client: client.get_packages_by_country("TR")))
+
+    assert packages == []
+
+
+def test_order_is_not_retried():
+    api = FakeAPI(failures=1)
+
+    async def scenario(client):
+        with pytest.raises(ESIMAccessError):
+            await client.order_profile("TR-1", 15000)
+
+    asyncio.run(run_with_client(api, scenario))
+    assert api.calls == 1
+
+
+def test_client_error_is_not_retried():
+    api = FakeAPI(failures=1, status=400)
+
+    async def scenario(client):
+        with pytest.raises(ESIMAccessError):
+            await client.query_order("B1")
+        return client.breaker.state
+
+    assert asyncio.run(run_with_client(api, scenario)) == CircuitBreaker.CLOSED
+    assert api.calls == 1
+
+
+def test_open_breaker_fails_fast():
+    api = FakeAPI(failures=10)
+
+    async def scenario(client):
+        with pytest.raises(ESIMAccessError):
+            await client.get_packages_by_country("TR")
+        calls = api.calls
+        with pytest.raises(ESIMAccessError):
+            await client.get_packages_by_country("DE")
+        return client.breaker.state, api.calls - calls
+
+    assert asyncio.run(run_with_client(api, scenario, threshold=3)) == (CircuitBreaker.OPEN, 0)
+
+
+def test_catalog_cache_serves_stale_catalog_on_failure():
+    api = FakeAPI()
+
+    async def scenario(client):
+        cache = CatalogCache(client.get_packages_by_country)
+        assert len(await cache.get("TR")) == 1
+
+        api.failures = 10
+        assert len(await cache.refresh("TR")) == 1
+        with pytest.raises(ESIMAccessError):
+            await cache.get("DE")
+
+    asyncio.run(run_with_client(api, scenario))
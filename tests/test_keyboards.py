@@ -0,0 +1,40 @@
+# tests/test_keyboards.py
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import EditMessageText
+from pydantic import ValidationError
+
+import keyboards.inline as inline
+
+NAMES = sorted(inline.STATIC_KEYBOARDS)
+
+
+def reply_markup_field(markup) -> str:
+    """reply_markup в том виде, в котором он уходит в Telegram"""
+    method = EditMessageText(text="t", chat_id=1, message_id=1, reply_markup=markup)
+    form = AiohttpSession().build_form_data(Bot("1:test"), method)
+    return next(value for options, _, value in form._fields if options["name"] == "reply_markup")
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_static_keyboard_is_shared_and_frozen(name):
+    markup = getattr(inline, name)()
+
+    assert markup is getattr(inline, name)()
+    with pytest.raises(TypeError):
+        markup.inline_keyboard.append([])
+    with pytest.raises(TypeError):
+        markup.inline_keyboard[0].append(markup.inline_keyboard[0][0])
+    with pytest.raises(ValidationError):
+        markup.inline_keyboard = []
+    with pytest.raises(ValidationError):
+        markup.inline_keyboard[0][0].text = "x"
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_frozen_keyboard_is_sent_as_built(name):
+    getter = getattr(inline, name)
+
+    assert reply_markup_field(getter()) == reply_markup_field(getter.build())
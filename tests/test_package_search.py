@@ -0,0 +1,60 @@
+# tests/test_package_search.py
+
+import asyncio
+
+from utils.catalog_cache import CatalogCache
+from utils.package_search import PackageSearch
+from utils.packages import GB
+
+REGIONS = {"europe": {"name": "Европа", "countries": ["Германия"]}}
+COUNTRY_CODES = {"Германия": "DE"}
+
+
+def make_package(code: str, volume: int, days: int, price: int) -> dict:
+    return {
+        "packageCode": code,
+        "name": code,
+        "volume": volume,
+        "duration": days,
+        "durationUnit": "DAY",
+        "price": price
+    }
+
+
+def make_search(packages: list) -> PackageSearch:
+    async def fetcher(country_code: str) -> list:
+        return packages
+
+    cache = CatalogCache(fetcher)
+    asyncio.run(cache.get("DE"))
+    return PackageSearch(cache, REGIONS, COUNTRY_CODES)
+
+
+def test_equal_price_prefers_larger_volume_at_limit():
+    packages = [make_package(f"small-{i}", GB, 7, 50000) for i in range(5)]
+    packages += [make_package(f"large-{i}", 10 * GB, 7, 50000) for i in range(5)]
+
+    results = make_search(packages).search(limit=3)
+
+    assert [view.volume for _, view in results] == [10 * GB] * 3
+
+
+def test_equal_price_and_volume_prefers_longer_duration():
+    packages = [
+        make_package("short", GB, 7, 50000),
+        make_package("long", GB, 30, 50000),
+        make_package("cheap", GB, 1, 10000)
+    ]
+
+    results = make_search(packages).search(limit=2)
+
+    assert [view.code for _, view in results] == ["cheap", "long"]
+
+
+def test_filtered_search_uses_same_order():
+    packages = [make_package(f"small-{i}", GB, 7, 50000) for i in range(5)]
+    packages += [make_package(f"large-{i}", 10 * GB, 30, 50000) for i in range(5)]
+
+    results = make_search(packages).search(min_days=7, max_days=30, limit=3)
+
+    assert [view.code for _, view in results] == ["large-0", "large-1", "large-2"]
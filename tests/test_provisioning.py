@@ -0,0 +1,41 @@
+# tests/test_provisioning.py
+
+import asyncio
+
+from config import TEXTS
+from handlers import buying
+from utils.provisioning import ProvisioningPoller
+
+
+class FakeClient:
+    async def query_order(self, order_no):
+        # eSIM еще не выпущена
+        return [{"iccid": "8900", "ac": "", "qrCodeUrl": ""}]
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text))
+
+
+def test_expired_order_notifies_user():
+    poller = ProvisioningPoller(FakeClient(), initial_delay=0, max_age=0)
+    poller.on_expired(buying.send_esim_delayed)
+    bot = FakeBot()
+
+    async def scenario():
+        await poller.start(bot)
+        poller.register("B42", user_id=1, chat_id=7)
+        for _ in range(100):
+            if bot.messages:
+                break
+            await asyncio.sleep(0.01)
+        await poller.stop()
+
+    asyncio.run(scenario())
+
+    assert bot.messages == [(7, TEXTS["esim_delayed"].format(order_no="B42"))]
+    assert not poller.is_pending("B42")
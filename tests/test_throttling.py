@@ -0,0 +1,117 @@
+# tests/test_throttling.py
+
+from config import (
+    THROTTLE_USER_RATE,
+    THROTTLE_USER_BURST,
+    THROTTLE_GLOBAL_RATE,
+    THROTTLE_GLOBAL_BURST,
+    THROTTLE_IDLE_TTL
+)
+import asyncio
+
+import pytest
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.types import CallbackQuery, User
+
+from handlers import callbacks, start
+from handlers.buying import BuyingStates
+from keyboards.callback_data import RegionCallback, CountryCallback, PackageCallback
+from utils.throttling import COST_FLAG, ThrottlingMiddleware
+
+# Покупка в обычном темпе: (секунда, callback_data, состояние FSM)
+BUY_FLOW = [
+    (0, "buy_esim", None),
+    (1, RegionCallback(region=0).pack(), None),
+    (2, CountryCallback(country="TR").pack(), BuyingStates.selecting_country.state),
+    (4, PackageCallback(index=0).pack(), BuyingStates.selecting_package.state),
+    (6, "confirm_purchase", BuyingStates.confirming_purchase.state),
+]
+
+
+def make_throttling() -> ThrottlingMiddleware:
+    throttling = ThrottlingMiddleware(
+        user_rate=THROTTLE_USER_RATE,
+        user_burst=THROTTLE_USER_BURST,
+        global_rate=THROTTLE_GLOBAL_RATE,
+        global_burst=THROTTLE_GLOBAL_BURST,
+        idle_ttl=THROTTLE_IDLE_TTL
+    )
+    throttling._global.updated_at = 0.0
+    return throttling
+
+
+def route_cost(throttling: ThrottlingMiddleware, data: str, raw_state) -> float:
+    route, _ = callbacks.match(data, raw_state)
+    assert route is not None, data
+    return route.flags.get(COST_FLAG, throttling.default_cost)
+
+
+def test_costs_are_well_below_burst():
+    costs = [route_cost(make_throttling(), data, state) for _, data, state in BUY_FLOW]
+
+    assert max(costs) * 2 <= THROTTLE_USER_BURST
+
+
+def test_buy_flow_at_human_speed_is_not_throttled():
+    throttling = make_throttling()
+
+    for now, data, state in BUY_FLOW:
+        assert throttling.check(1, route_cost(throttling, data, state), now) is None, data
+
+
+def test_buy_flow_twice_in_a_row_is_not_throttled():
+    throttling = make_throttling()
+
+    # Пользователь сразу покупает вторую eSIM
+    for offset in (0, 8):
+        for now, data, state in BUY_FLOW:
+            assert throttling.check(1, route_cost(throttling, data, state), offset + now) is None, data
+
+
+def test_flood_is_throttled_and_recovers():
+    throttling = make_throttling()
+    cost = route_cost(throttling, CountryCallback(country="TR").pack(), BuyingStates.selecting_country.state)
+
+    results = [throttling.check(1, cost, 0.0) is None for _ in range(10)]
+
+    assert results.count(True) == THROTTLE_USER_BURST // cost
+    assert throttling.check(1, cost, cost / THROTTLE_USER_RATE) is None
+    # Другой пользователь не страдает от чужого флуда
+    assert throttling.check(2, cost, 0.0) is None
+
+
+def test_idle_buckets_expire():
+    throttling = make_throttling()
+    throttling.check(1, 1, 0.0)
+
+    throttling.check(2, 1, THROTTLE_IDLE_TTL + 1)
+
+    assert throttling.stats()["users"] == 1
+    assert throttling.stats()["expired"] == 1
+
+
+def test_unmatched_callback_is_charged_once():
+    throttling = make_throttling()
+    user = User(id=1, is_bot=False, first_name="test")
+    event = CallbackQuery(id="1", from_user=user, chat_instance="1", data="old_button")
+    # Обработчики в порядке, в котором их вызывает диспетчер
+    dispatch = callbacks.callback_query.handlers[0]
+    stale = start.router.callback_query.handlers[0]
+
+    async def skip(event, data):
+        raise SkipHandler()
+
+    async def handled(event, data):
+        return True
+
+    async def deliver():
+        data = {"event_from_user": user, "raw_state": None}
+        try:
+            await throttling(skip, event, dict(data, handler=dispatch))
+        except SkipHandler:
+            pass
+        return await throttling(handled, event, dict(data, handler=stale))
+
+    assert asyncio.run(deliver()) is True
+    assert throttling.stats()["allowed"] == 1
+    assert throttling._users[1].tokens == pytest.approx(THROTTLE_USER_BURST - throttling.default_cost, abs=0.01)
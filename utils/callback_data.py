@@ -0,0 +1,153 @@
+# utils/callback_data.py
+
+from typing import Any, Callable, ClassVar, Dict, Tuple
+
+# Ограничение Telegram на размер callback_data
+MAX_CALLBACK_BYTES = 64
+
+SEPARATOR = ":"
+
+
+def _parse_bool(value: str) -> bool:
+    if value == "1":
+        return True
+    if value == "0":
+        return False
+    raise ValueError(f"Ожидалось 0 или 1, получено {value!r}")
+
+
+def _parse_int(value: str) -> int:
+    # int() принимает также пробелы и "_" - такие значения не допускаем
+    if value.isdigit() or value[:1] == "-" and value[1:].isdigit():
+        return int(value)
+    raise ValueError(f"Ожидалось целое число, получено {value!r}")
+
+
+def _format_bool(value: bool) -> str:
+    return "1" if value else "0"
+
+
+_PARSERS: Dict[type, Callable[[str], Any]] = {int: _parse_int, str: str, bool: _parse_bool}
+_FORMATTERS: Dict[type, Callable[[Any], str]] = {int: str, str: str, bool: _format_bool}
+
+
+class CallbackData:
+    """
+    Типизированные данные callback-кнопки
+
+    Подкласс задает короткий префикс и поля с аннотациями типов
+    (int, str или bool), а также __slots__ с теми же именами:
+
+        class RegionCallback(CallbackData, prefix="r"):
+            __slots__ = ("region",)
+            region: int
+
+    RegionCallback(region=1).pack() дает "r:1", а RegionCallback.unpack("1")
+    разбирает данные после префикса обратно в объект. Поле типа str
+    может содержать разделитель, только если оно последнее.
+    """
+
+    __slots__ = ()
+
+    prefix: ClassVar[str] = ""
+    _fields: ClassVar[Tuple[str, ...]] = ()
+    _types: ClassVar[Tuple[type, ...]] = ()
+    _parsers: ClassVar[Tuple[Tuple[str, Callable[[str], Any]], ...]] = ()
+
+    def __init_subclass__(cls, prefix: str, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        if not prefix or SEPARATOR in prefix:
+            raise ValueError(f"Некорректный префикс callback_data: {prefix!r}")
+
+        annotations = {
+            name: annotation
+            for name, annotation in cls.__dict__.get("__annotations__", {}).items()
+            if getattr(annotation, "__origin__", None) is not ClassVar
+        }
+        for name, annotation in annotations.items():
+            if annotation not in _PARSERS:
+                raise TypeError(f"{cls.__name__}.{name}: неподдерживаемый тип {annotation!r}")
+
+        cls.prefix = prefix
+        cls._fields = tuple(annotations)
+        cls._types = tuple(annotations.values())
+        cls._parsers = tuple((name, _PARSERS[annotation]) for name, annotation in annotations.items())
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        values = dict(zip(self._fields, args))
+        values.update(kwargs)
+        if set(values) != set(self._fields):
+            raise TypeError(f"{type(self).__name__} ожидает поля {self._fields}, получено {tuple(values)}")
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def pack(self) -> str:
+        """
+        Упаковывает данные в строку callback_data
+
+        :return: Строка вида "префикс:поле1:поле2"
+        """
+        parts = [self.prefix]
+        for index, (name, field_type) in enumerate(zip(self._fields, self._types)):
+            value = _FORMATTERS[field_type](getattr(self, name))
+            if SEPARATOR in value and index != len(self._fields) - 1:
+                raise ValueError(f"{type(self).__name__}.{name} не может содержать {SEPARATOR!r}")
+            parts.append(value)
+
+        data = SEPARATOR.join(parts)
+        if len(data.encode("utf-8")) > MAX_CALLBACK_BYTES:
+            raise ValueError(f"callback_data длиннее {MAX_CALLBACK_BYTES} байт: {data!r}")
+        return data
+
+    @classmethod
+    def unpack(cls, payload: str) -> "CallbackData":
+        """
+        Разбирает данные после префикса
+
+        :param payload: Часть callback_data после "префикс:"
+        :return: Объект данных
+        :raises ValueError: Если данные не соответствуют полям
+        """
+        parsers = cls._parsers
+        count = len(parsers)
+        obj = cls.__new__(cls)
+
+        if count == 1:
+            # Самый частый случай - одно поле, без split
+            name, parser = parsers[0]
+            setattr(obj, name, parser(payload))
+            return obj
+
+        parts = payload.split(SEPARATOR, count - 1) if count else [payload] if payload else []
+        if len(parts) != count:
+            raise ValueError(f"{cls.__name__}: ожидалось полей {count}, получено {payload!r}")
+
+        for (name, parser), part in zip(parsers, parts):
+            setattr(obj, name, parser(part))
+        return obj
+
+    @classmethod
+    def parse(cls, data: str) -> "CallbackData":
+        """
+        Разбирает полную строку callback_data с префиксом
+
+        :param data: callback_data
+        :return: Объект данных
+        :raises ValueError: Если префикс или данные не подходят
+        """
+        prefix, separator, payload = data.partition(SEPARATOR)
+        if prefix != cls.prefix or not separator:
+            raise ValueError(f"{cls.__name__}: неверный префикс в {data!r}")
+        return cls.unpack(payload)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __hash__(self) -> int:
+        return hash((type(self), tuple(getattr(self, name) for name in self._fields)))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
@@ -0,0 +1,240 @@
+# utils/callback_router.py
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Type, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.dispatcher.flags import extract_flags_from_object
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from utils.callback_data import SEPARATOR, CallbackData
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+CallbackHandler = Callable[..., Awaitable[Any]]
+StateFilter = Union[State, str, None, Iterable[Union[State, str, None]]]
+
+
+def _state_names(state: StateFilter) -> Optional[FrozenSet[Optional[str]]]:
+    """Имена состояний FSM для маршрута (None - любое состояние)"""
+    if state is None:
+        return None
+    if isinstance(state, (State, str)):
+        state = (state,)
+    return frozenset(item.state if isinstance(item, State) else item for item in state)
+
+
+class CallbackRoute:
+    """
+    Маршрут callback_data: обработчик, допустимые состояния FSM,
+    тип данных кнопки и время обработки
+    """
+
+    __slots__ = ("key", "handler", "states", "codec", "calls", "total_ns", "max_ns")
+
+    def __init__(
+        self,
+        key: str,
+        handler: CallbackHandler,
+        states: Optional[FrozenSet[Optional[str]]],
+        codec: Optional[Type[CallbackData]] = None
+    ):
+        self.key = key
+        self.handler = CallableObject(callback=handler)
+        self.states = states
+        self.codec = codec
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    @property
+    def flags(self) -> Dict[str, Any]:
+        """Флаги aiogram обработчика (@flags...)"""
+        return extract_flags_from_object(self.handler.callback)
+
+    def accepts(self, raw_state: Optional[str]) -> bool:
+        """Подходит ли маршрут для текущего состояния FSM"""
+        return self.states is None or raw_state in self.states
+
+    def record(self, elapsed_ns: int) -> None:
+        """Учитывает время одного вызова обработчика"""
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+
+class CallbackRouter(Router):
+    """
+    Роутер callback-запросов с таблицей маршрутов вместо цепочки фильтров
+
+    Обработчики регистрируются по точному значению callback_data или по
+    префиксу. При каждом callback роутер делает поиск в словаре точных
+    значений, а затем в словаре префиксов, перебирая только позиции
+    разделителя в строке (от самого длинного префикса к короткому).
+    Остаток строки после префикса передается обработчику как payload.
+
+    Если маршрут зарегистрирован по типу CallbackData, данные кнопки
+    разбираются один раз и передаются обработчику как callback_data.
+
+    Если подходящего маршрута нет или состояние FSM не совпадает,
+    событие передается дальше по дереву роутеров.
+    """
+
+    def __init__(self, *, name: Optional[str] = None, separator: str = SEPARATOR):
+        """
+        Инициализация роутера
+
+        :param name: Имя роутера
+        :param separator: Разделитель префикса и данных в callback_data
+        """
+        super().__init__(name=name)
+        self.separator = separator
+
+        self._exact: Dict[str, List[CallbackRoute]] = {}
+        self._prefixes: Dict[str, List[CallbackRoute]] = {}
+
+        # Счетчики поиска маршрута
+        self.lookups = 0
+        self.lookup_ns = 0
+        self.unmatched = 0
+
+        self.callback_query.register(self._dispatch)
+
+    def exact(self, data: str, state: StateFilter = None):
+        """
+        Регистрирует обработчик для точного значения callback_data
+
+        :param data: Значение callback_data
+        :param state: Состояние FSM или несколько состояний, в которых работает обработчик (None - в любом)
+        """
+        return self._register(self._exact, data, state)
+
+    def prefix(self, prefix: Union[str, Type[CallbackData]], state: StateFilter = None):
+        """
+        Регистрирует обработчик для callback_data, начинающихся с префикса
+
+        :param prefix: Префикс, оканчивающийся разделителем ("r:"), или тип CallbackData
+        :param state: Состояние FSM или несколько состояний, в которых работает обработчик (None - в любом)
+        """
+        codec = None
+        if isinstance(prefix, type) and issubclass(prefix, CallbackData):
+            codec, prefix = prefix, prefix.prefix + self.separator
+        if not prefix.endswith(self.separator):
+            raise ValueError(f"Префикс {prefix!r} должен оканчиваться на {self.separator!r}")
+        return self._register(self._prefixes, prefix, state, codec)
+
+    def _register(
+        self,
+        table: Dict[str, List[CallbackRoute]],
+        key: str,
+        state: StateFilter,
+        codec: Optional[Type[CallbackData]] = None
+    ) -> Callable[[CallbackHandler], CallbackHandler]:
+        states = _state_names(state)
+
+        def decorator(handler: CallbackHandler) -> CallbackHandler:
+            table.setdefault(key, []).append(CallbackRoute(key, handler, states, codec))
+            return handler
+
+        return decorator
+
+    def resolve(self, data: str) -> Tuple[List[CallbackRoute], str]:
+        """
+        Находит маршруты для callback_data
+
+        :param data: callback_data
+        :return: Маршруты (пустой список, если их нет) и payload после префикса
+        """
+        routes = self._exact.get(data)
+        if routes is not None:
+            return routes, ""
+
+        end = len(data)
+        while True:
+            position = data.rfind(self.separator, 0, end)
+            if position < 0:
+                return [], data
+            routes = self._prefixes.get(data[:position + 1])
+            if routes is not None:
+                return routes, data[position + 1:]
+            end = position
+
+    def match(self, data: str, raw_state: Optional[str]) -> Tuple[Optional[CallbackRoute], str]:
+        """
+        Находит маршрут для callback_data с учетом состояния FSM
+
+        :param data: callback_data
+        :param raw_state: Текущее состояние FSM
+        :return: Маршрут (или None) и payload после префикса
+        """
+        routes, payload = self.resolve(data)
+        return next((route for route in routes if route.accepts(raw_state)), None), payload
+
+    async def _dispatch(self, callback: CallbackQuery, **kwargs: Any) -> Any:
+        """Единственный обработчик callback_query роутера"""
+        started = time.perf_counter_ns()
+        route, payload = self.match(callback.data or "", kwargs.get("raw_state"))
+
+        callback_data = None
+        if route is not None and route.codec is not None:
+            try:
+                callback_data = route.codec.unpack(payload)
+            except ValueError:
+                route = None
+
+        resolved = time.perf_counter_ns()
+        self.lookups += 1
+        self.lookup_ns += resolved - started
+
+        if route is None:
+            self.unmatched += 1
+            raise SkipHandler()
+
+        try:
+            return await route.handler.call(callback, payload=payload, callback_data=callback_data, **kwargs)
+        finally:
+            route.record(time.perf_counter_ns() - resolved)
+
+    def routes(self) -> List[CallbackRoute]:
+        """Все зарегистрированные маршруты"""
+        return [route for table in (self._exact, self._prefixes) for routes in table.values() for route in routes]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Время поиска маршрута и обработки по каждому маршруту
+
+        :return: Счетчики поиска и {маршрут: вызовы, среднее и максимальное время в мс}
+        """
+        return {
+            "lookups": self.lookups,
+            "lookup_avg_us": self.lookup_ns / self.lookups / 1000 if self.lookups else 0.0,
+            "unmatched": self.unmatched,
+            "routes": {
+                f"{route.key}@{'|'.join(sorted(map(str, route.states)))}" if route.states else route.key: {
+                    "calls": route.calls,
+                    "avg_ms": route.total_ns / route.calls / 1e6 if route.calls else 0.0,
+                    "max_ms": route.max_ns / 1e6
+                }
+                for route in self.routes()
+                if route.calls
+            }
+        }
+
+    async def log_stats(self) -> None:
+        """Пишет в лог время поиска маршрута и обработки по маршрутам"""
+        stats = self.stats()
+        logger.info(
+            f"Callback-запросов: {stats['lookups']}, поиск маршрута в среднем "
+            f"{stats['lookup_avg_us']:.1f} мкс, без маршрута: {stats['unmatched']}"
+        )
+        for key, route in sorted(stats["routes"].items(), key=lambda item: -item[1]["avg_ms"]):
+            logger.info(
+                f"  {key}: {route['calls']} вызовов, среднее {route['avg_ms']:.1f} мс, "
+                f"максимум {route['max_ms']:.1f} мс"
+            )
@@ -0,0 +1,280 @@
+# utils/catalog_cache.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.packages import PackageTable, PackageView, parse_packages
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class CatalogEntry:
+    """
+    Запись кэша каталога: таблица тарифов, версия и время получения
+
+    Версия меняется только при изменении содержимого каталога, поэтому
+    индекс пакета из старой версии можно безопасно проверить.
+    """
+
+    __slots__ = ("packages", "version", "fetched_at")
+
+    def __init__(self, packages: PackageTable, version: int, fetched_at: float):
+        self.packages = packages
+        self.version = version
+        self.fetched_at = fetched_at
+
+    def find(self, package_code: str) -> Optional[PackageView]:
+        """Поиск тарифа по packageCode"""
+        return self.packages.find(package_code)
+
+
+class CatalogCache:
+    """
+    Кэш каталога тарифов с TTL, LRU-вытеснением и stale-while-revalidate
+
+    Ключ кэша - locationCode. Ответ API один раз преобразуется в список
+    PackageTable при получении. Устаревшая запись отдается сразу, а обновление
+    запускается в фоне, поэтому пользователь не ждет ответа API.
+    """
+
+    def __init__(
+        self,
+        fetcher: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+        ttl: float = 3600,
+        max_size: int = 256
+    ):
+        """
+        Инициализация кэша каталога
+
+        :param fetcher: Корутина получения пакетов по коду страны
+        :param ttl: Время жизни записи (в секундах)
+        :param max_size: Максимальное число стран в кэше
+        """
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries: "OrderedDict[str, CatalogEntry]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._version = 0
+        # Меняется при любом изменении набора каталогов в кэше
+        self.generation = 0
+        # Индекс packageCode -> locationCode по всем странам в кэше
+        self._package_index: Dict[str, str] = {}
+
+        # Счетчики
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, country_code: str) -> bool:
+        return country_code in self._entries
+
+    def peek(self, country_code: str) -> Optional[PackageTable]:
+        """
+        Возвращает пакеты из кэша без обращения к API и без учета в счетчиках
+
+        :param country_code: Код страны (ISO)
+        :return: Список пакетов или None, если страны нет в кэше
+        """
+        entry = self._entries.get(country_code)
+        return entry.packages if entry is not None else None
+
+    def version(self, country_code: str) -> Optional[int]:
+        """
+        Возвращает версию каталога страны
+
+        :param country_code: Код страны (ISO)
+        :return: Версия или None, если страны нет в кэше
+        """
+        entry = self._entries.get(country_code)
+        return entry.version if entry is not None else None
+
+    def is_fresh(self, country_code: str) -> bool:
+        """Проверяет, есть ли в кэше неустаревшая запись для страны"""
+        entry = self._entries.get(country_code)
+        return entry is not None and time.monotonic() - entry.fetched_at < self.ttl
+
+    async def get(self, country_code: str) -> PackageTable:
+        """
+        Получение пакетов для страны через кэш
+
+        :param country_code: Код страны (ISO)
+        :return: Список доступных пакетов
+        """
+        entry = self._entries.get(country_code)
+
+        if entry is None:
+            self.misses += 1
+            return await self.refresh(country_code)
+
+        self._entries.move_to_end(country_code)
+
+        if time.monotonic() - entry.fetched_at < self.ttl:
+            self.hits += 1
+        else:
+            # Отдаем устаревшие данные и обновляем запись в фоне
+            self.stale_hits += 1
+            self._schedule_refresh(country_code)
+
+        return entry.packages
+
+    async def find_package(self, country_code: str, package_code: str) -> Optional[PackageView]:
+        """
+        Поиск пакета в каталоге страны по packageCode
+
+        :param country_code: Код страны (ISO)
+        :param package_code: Код пакета
+        :return: Пакет или None, если он не найден
+        """
+        entry = self._entries.get(country_code)
+
+        if entry is None:
+            await self.get(country_code)
+            entry = self._entries.get(country_code)
+            if entry is None:
+                return None
+
+        return entry.find(package_code)
+
+    def country_of(self, package_code: str) -> Optional[str]:
+        """
+        Код страны, в каталоге которой есть тариф
+
+        :param package_code: Код пакета
+        :return: Код страны (ISO) или None, если тарифа нет в кэше
+        """
+        return self._package_index.get(package_code)
+
+    def locate(self, package_code: str) -> Optional[PackageView]:
+        """
+        Поиск тарифа по packageCode среди всех стран в кэше
+
+        :param package_code: Код пакета
+        :return: Тариф или None, если он не найден
+        """
+        country_code = self._package_index.get(package_code)
+        if country_code is None:
+            return None
+        entry = self._entries.get(country_code)
+        return entry.find(package_code) if entry is not None else None
+
+    async def refresh(self, country_code: str) -> PackageTable:
+        """
+        Принудительно загружает пакеты из API и сохраняет их в кэш
+
+        Пустой ответ не кэшируется: это может быть временная ошибка API.
+        Если запрос не выполнен, отдаются старые данные, а без них
+        ошибка передается вызывающему коду.
+
+        :param country_code: Код страны (ISO)
+        :return: Список доступных пакетов
+        """
+        self.refreshes += 1
+        try:
+            fetched = await self.fetcher(country_code)
+        except Exception as e:
+            entry = self._entries.get(country_code)
+            if entry is None:
+                raise
+            logger.warning(f"Каталог {country_code} не обновлен, используются старые данные: {e}")
+            return entry.packages
+
+        packages = parse_packages(fetched)
+
+        if packages:
+            self._store(country_code, packages)
+            return packages
+
+        # Если API вернул пустой ответ, лучше показать старые данные
+        entry = self._entries.get(country_code)
+        return entry.packages if entry is not None else packages
+
+    def invalidate(self, country_code: Optional[str] = None) -> None:
+        """
+        Удаляет запись для страны или очищает весь кэш
+
+        :param country_code: Код страны (ISO) или None для полной очистки
+        """
+        if country_code is None:
+            self._entries.clear()
+            self._package_index.clear()
+        else:
+            self._unindex(country_code)
+            self._entries.pop(country_code, None)
+        self.generation += 1
+
+    def items(self) -> Iterator[Tuple[str, PackageTable]]:
+        """Каталоги всех стран в кэше (включая устаревшие) без обращения к API"""
+        for country_code, entry in self._entries.items():
+            yield country_code, entry.packages
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики кэша"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes
+        }
+
+    def _store(self, country_code: str, packages: PackageTable) -> None:
+        """Сохраняет запись и вытесняет самые давно использованные"""
+        entry = self._entries.get(country_code)
+
+        if entry is not None and entry.packages == packages:
+            # Каталог не изменился - продлеваем запись, версия остается прежней
+            entry.fetched_at = time.monotonic()
+        else:
+            self._version += 1
+            self._unindex(country_code)
+            self._entries[country_code] = CatalogEntry(packages, self._version, time.monotonic())
+            for package_code in packages.codes:
+                self._package_index[package_code] = country_code
+            self.generation += 1
+
+        self._entries.move_to_end(country_code)
+
+        while len(self._entries) > self.max_size:
+            evicted = next(iter(self._entries))
+            self._unindex(evicted)
+            del self._entries[evicted]
+            self.evictions += 1
+            self.generation += 1
+            logger.debug(f"Каталог {evicted} вытеснен из кэша")
+
+    def _unindex(self, country_code: str) -> None:
+        """Удаляет тарифы страны из индекса packageCode"""
+        entry = self._entries.get(country_code)
+        if entry is None:
+            return
+        for package_code in entry.packages.codes:
+            if self._package_index.get(package_code) == country_code:
+                del self._package_index[package_code]
+
+    def _schedule_refresh(self, country_code: str) -> None:
+        """Запускает фоновое обновление записи, если оно еще не идет"""
+        if country_code in self._refreshing:
+            return
+
+        task = asyncio.create_task(self._background_refresh(country_code))
+        self._refreshing[country_code] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(country_code, None))
+
+    async def _background_refresh(self, country_code: str) -> None:
+        """Фоновое обновление записи кэша"""
+        try:
+            await self.refresh(country_code)
+        except Exception as e:
+            logger.error(f"Ошибка фонового обновления каталога {country_code}: {e}")
@@ -0,0 +1,163 @@
+# utils/catalog_warmer.py
+
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Iterable, List, Optional
+
+from utils.catalog_cache import CatalogCache
+from utils.metrics import MetricsRegistry
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class CatalogWarmer:
+    """
+    Фоновый прогрев кэша каталога
+
+    При запуске загружает пакеты для всех стран с ограниченной
+    параллельностью, затем периодически обновляет их со случайным
+    разбросом интервала, чтобы запросы не шли к API одной пачкой.
+
+    Каталог считается прогретым, когда в кэше есть хотя бы доля min_ready
+    стран. До этого недостающие страны загружаются повторно каждые
+    retry_interval секунд (например, если API был недоступен при запуске).
+    """
+
+    def __init__(
+        self,
+        cache: CatalogCache,
+        country_codes: Iterable[str],
+        concurrency: int = 5,
+        interval: float = 3000,
+        jitter: float = 0.1,
+        min_ready: float = 0.8,
+        retry_interval: float = 60,
+        metrics: Optional[MetricsRegistry] = None
+    ):
+        """
+        Инициализация прогрева каталога
+
+        :param cache: Кэш каталога
+        :param country_codes: Коды стран (ISO), дубликаты удаляются
+        :param concurrency: Максимальное число одновременных загрузок
+        :param interval: Интервал повторного прогрева (в секундах)
+        :param jitter: Доля случайного разброса интервала (0.1 = ±10%)
+        :param min_ready: Доля стран в кэше, после которой каталог считается прогретым
+        :param retry_interval: Интервал повторной загрузки, пока каталог не прогрет (в секундах)
+        :param metrics: Набор метрик, в котором регистрируется готовность каталога
+        """
+        self.cache = cache
+        # dict.fromkeys сохраняет порядок и убирает алиасы одной страны
+        self.country_codes: List[str] = list(dict.fromkeys(country_codes))
+        self.concurrency = concurrency
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+        # Минимальное число стран в кэше для готовности (хотя бы одна)
+        self.min_countries = max(1, math.ceil(len(self.country_codes) * min_ready))
+
+        self.ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        if metrics is not None:
+            self._register_metrics(metrics)
+
+    def _register_metrics(self, metrics: MetricsRegistry) -> None:
+        """Создает метрики готовности каталога"""
+        ready = metrics.gauge("esim_catalog_ready", "Каталог тарифов прогрет (1 - да)")
+        countries = metrics.gauge("esim_catalog_countries", "Стран в кэше каталога из списка прогрева")
+
+        def collect() -> None:
+            ready.labels().set(1 if self.is_ready else 0)
+            countries.labels().set(self.cached_countries())
+
+        metrics.on_collect(collect)
+
+    @property
+    def is_ready(self) -> bool:
+        """Прогрет ли каталог: в кэше есть не меньше min_countries стран"""
+        return self.ready.is_set()
+
+    def cached_countries(self) -> int:
+        """Число стран из списка прогрева, каталог которых есть в кэше"""
+        return sum(1 for country_code in self.country_codes if country_code in self.cache)
+
+    async def start(self) -> None:
+        """Запускает фоновый прогрев"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновый прогрев"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def warm(self, country_codes: Optional[List[str]] = None) -> int:
+        """
+        Загружает пакеты для стран
+
+        :param country_codes: Коды стран (по умолчанию все страны прогрева)
+        :return: Количество стран, для которых получены пакеты
+        """
+        if country_codes is None:
+            country_codes = self.country_codes
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_one(country_code: str) -> bool:
+            async with semaphore:
+                try:
+                    packages = await self.cache.refresh(country_code)
+                    return bool(packages)
+                except Exception as e:
+                    logger.error(f"Ошибка прогрева каталога {country_code}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(warm_one(code) for code in country_codes))
+        return sum(results)
+
+    def _next_delay(self) -> float:
+        """Интервал до следующего прогрева со случайным разбросом"""
+        spread = self.interval * self.jitter
+        return max(1.0, self.interval + random.uniform(-spread, spread))
+
+    async def _run(self) -> None:
+        """Основной цикл прогрева"""
+        started = time.monotonic()
+
+        # Пока каталог не прогрет, догружаем только недостающие страны
+        while not self.ready.is_set():
+            missing = [code for code in self.country_codes if code not in self.cache]
+            await self.warm(missing)
+            cached = self.cached_countries()
+
+            if cached >= self.min_countries:
+                self.ready.set()
+                logger.info(
+                    f"Каталог прогрет: {cached}/{len(self.country_codes)} стран "
+                    f"за {time.monotonic() - started:.1f} с"
+                )
+            else:
+                logger.warning(
+                    f"Каталог не прогрет: {cached}/{len(self.country_codes)} стран "
+                    f"(нужно {self.min_countries}), повтор через {self.retry_interval:g} с"
+                )
+                await asyncio.sleep(self.retry_interval)
+
+        while True:
+            await asyncio.sleep(self._next_delay())
+
+            started = time.monotonic()
+            warmed = await self.warm()
+            logger.debug(
+                f"Каталог обновлен: {warmed}/{len(self.country_codes)} стран "
+                f"за {time.monotonic() - started:.1f} с"
+            )
@@ -0,0 +1,145 @@
+# utils/circuit_breaker.py
+
+import logging
+import time
+from typing import Callable, Dict, Union
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонен: внешний сервис считается недоступным"""
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель запросов к внешнему сервису
+
+    После failure_threshold сбоев подряд выключатель размыкается (open):
+    запросы сразу отклоняются с CircuitOpenError, не дожидаясь таймаутов.
+    Через recovery_timeout секунд он переходит в half_open и пропускает
+    не больше half_open_max_calls пробных запросов. Успешная проба
+    замыкает выключатель (closed), сбой снова размыкает его.
+
+    Сбоем считается только недоступность сервиса (таймаут, обрыв
+    соединения, ответ 5xx) - решает вызывающий код.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        name: str = "",
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Инициализация выключателя
+
+        :param failure_threshold: Число сбоев подряд, после которого выключатель размыкается
+        :param recovery_timeout: Через сколько секунд после размыкания пробовать снова
+        :param half_open_max_calls: Число одновременных пробных запросов в half_open
+        :param name: Имя сервиса для логов
+        :param clock: Источник времени (в секундах)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self.clock = clock
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        # Счетчики
+        self.rejected = 0
+        self.opened = 0
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние: closed, open или half_open"""
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.recovery_timeout:
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    @property
+    def is_closed(self) -> bool:
+        """Работает ли сервис в обычном режиме"""
+        return self.state == self.CLOSED
+
+    def _set_state(self, state: str) -> None:
+        """Меняет состояние и пишет переход в лог"""
+        if state == self._state:
+            return
+        previous, self._state = self._state, state
+        self._probes = 0
+
+        if state == self.OPEN:
+            self._opened_at = self.clock()
+            self.opened += 1
+            logger.warning(
+                f"{self.name or 'Сервис'} недоступен ({previous} -> open), "
+                f"запросы отклоняются {self.recovery_timeout:g} с"
+            )
+        else:
+            logger.info(f"{self.name or 'Сервис'}: {previous} -> {state}")
+
+    def before_call(self) -> None:
+        """
+        Проверяет, можно ли выполнить запрос
+
+        В half_open занимает место пробного запроса, которое освобождают
+        record_success, record_failure или release.
+
+        :raises CircuitOpenError: Если выключатель разомкнут или все пробы уже идут
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return
+
+        self.rejected += 1
+        raise CircuitOpenError(f"{self.name or 'Сервис'} временно недоступен")
+
+    def record_success(self) -> None:
+        """Запрос выполнен: сервис отвечает"""
+        self.successes += 1
+        self._failures = 0
+        if self._state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Запрос не выполнен из-за недоступности сервиса"""
+        self.failures += 1
+        self._failures += 1
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self._failures >= self.failure_threshold
+        ):
+            self._set_state(self.OPEN)
+
+    def release(self) -> None:
+        """Запрос прерван без результата (например, отменен)"""
+        if self._state == self.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def stats(self) -> Dict[str, Union[str, int]]:
+        """Возвращает состояние и счетчики выключателя"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.failures
+        }
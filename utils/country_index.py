@@ -0,0 +1,196 @@
+# utils/country_index.py
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Все, что не буква и не цифра, считается разделителем слов
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Приводит название страны к виду для поиска
+
+    Регистр снимается через casefold, "ё" заменяется на "е", дефисы,
+    точки и лишние пробелы схлопываются в один пробел.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def trigrams(term: str) -> Tuple[str, ...]:
+    """Триграммы термина с пробелами по краям"""
+    padded = f"  {term} "
+    return tuple({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Расстояние Дамерау-Левенштейна (с перестановкой соседних букв)
+
+    Если расстояние больше limit, возвращается limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+
+    return previous[-1]
+
+
+class CountryMatch:
+    """
+    Результат поиска страны
+    """
+
+    __slots__ = ("code", "name", "distance")
+
+    def __init__(self, code: str, name: str, distance: int):
+        self.code = code
+        self.name = name
+        self.distance = distance
+
+    def __repr__(self) -> str:
+        return f"CountryMatch({self.code!r}, {self.name!r}, distance={self.distance})"
+
+
+class CountryIndex:
+    """
+    Индекс для поиска страны по введенному тексту
+
+    Строится один раз при запуске по названиям из COUNTRY_CODES,
+    дополнительным названиям и ISO-кодам. Точные совпадения ищутся
+    по словарю нормализованных названий, опечатки - по триграммам
+    с проверкой расстояния редактирования у лучших кандидатов.
+    """
+
+    def __init__(
+        self,
+        country_codes: Dict[str, str],
+        aliases: Optional[Dict[str, Iterable[str]]] = None,
+        max_candidates: int = 20
+    ):
+        """
+        Построение индекса
+
+        :param country_codes: Отображаемое название страны -> ISO-код
+        :param aliases: ISO-код -> дополнительные названия (английские, сокращения, варианты написания)
+        :param max_candidates: Сколько кандидатов по триграммам проверять расстоянием редактирования
+        """
+        self.max_candidates = max_candidates
+
+        # Отображаемое название - первое название страны в country_codes
+        self._names: Dict[str, str] = {}
+        for name, code in country_codes.items():
+            self._names.setdefault(code, name)
+
+        self._exact: Dict[str, str] = {}
+        self._terms: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, List[int]] = {}
+
+        for name, code in country_codes.items():
+            self._add(name, code)
+        for code, names in (aliases or {}).items():
+            for name in names:
+                self._add(name, code)
+        for code in self._names:
+            self._exact.setdefault(normalize(code), code)
+
+    def _add(self, name: str, code: str) -> None:
+        """Добавляет название страны в индекс"""
+        term = normalize(name)
+        if not term or term in self._exact:
+            return
+
+        self._exact[term] = code
+        term_id = len(self._terms)
+        self._terms.append((term, code))
+        for trigram in trigrams(term):
+            self._trigrams.setdefault(trigram, []).append(term_id)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._names
+
+    def name(self, code: str) -> str:
+        """Отображаемое название страны по ISO-коду"""
+        return self._names.get(code, code)
+
+    def suggest(self, text: str, limit: int = 3) -> List[CountryMatch]:
+        """
+        Похожие страны, от лучшего совпадения к худшему
+
+        :param text: Введенный пользователем текст
+        :param limit: Максимальное число стран в ответе
+        :return: Список совпадений (точное совпадение имеет distance=0)
+        """
+        query = normalize(text)
+        if not query:
+            return []
+
+        code = self._exact.get(query)
+        if code is not None:
+            return [CountryMatch(code, self._names[code], 0)]
+
+        # Кандидаты - термины с наибольшим числом общих триграмм
+        shared: Dict[int, int] = {}
+        for trigram in trigrams(query):
+            for term_id in self._trigrams.get(trigram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        candidates = sorted(shared, key=shared.__getitem__, reverse=True)[:self.max_candidates]
+
+        # Допустимое число опечаток растет с длиной запроса
+        limit_distance = 1 if len(query) <= 5 else 2 if len(query) <= 10 else 3
+        # Лучший ранг страны: (опечатки, -общие триграммы)
+        best: Dict[str, Tuple[int, int]] = {}
+
+        for term_id in candidates:
+            term, code = self._terms[term_id]
+            if len(query) >= 3 and term.startswith(query):
+                # Начало названия ("новая зел") считаем почти точным совпадением
+                distance = 1
+            else:
+                distance = edit_distance(query, term, limit_distance)
+                if distance > limit_distance:
+                    continue
+            rank = (distance, -shared[term_id])
+            if code not in best or rank < best[code]:
+                best[code] = rank
+
+        ranked = sorted(best.items(), key=lambda item: item[1])[:limit]
+        return [CountryMatch(code, self._names[code], rank[0]) for code, rank in ranked]
+
+    def lookup(self, text: str, max_distance: int = 1) -> Optional[CountryMatch]:
+        """
+        Однозначное совпадение для введенного текста
+
+        Возвращает страну при точном совпадении или при одной опечатке,
+        если у остальных стран опечаток больше. Более далекие совпадения
+        ("Нигерия" -> "Нигер") лучше предложить пользователю через suggest().
+
+        :param text: Введенный пользователем текст
+        :param max_distance: Максимальное число опечаток для однозначного совпадения
+        :return: Совпадение или None, если страна не определена однозначно
+        """
+        matches = self.suggest(text, limit=2)
+        if not matches or matches[0].distance > max_distance:
+            return None
+        if len(matches) == 1 or matches[0].distance < matches[1].distance:
+            return matches[0]
+        return None
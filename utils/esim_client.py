@@ -1,40 +1,372 @@
 # utils/esim_client.py
 
-import requests
-import json
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Any
 import uuid
 
+import aiohttp
+
+from utils import json_codec
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import MetricsRegistry
+from utils.single_flight import SingleFlight
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Таймауты эндпоинтов по умолчанию (в секундах)
+# Каталог бывает большим, а заказ API может обрабатывать долго
+DEFAULT_ENDPOINT_TIMEOUTS = {
+    "package/list": 20.0,
+    "esim/order": 30.0,
+    "esim/query": 10.0
+}
+
+# Запросы только на чтение - их можно безопасно повторять
+# esim/order не повторяется: при обрыве после отправки заказ мог быть создан
+IDEMPOTENT_PATHS = frozenset({"package/list", "esim/query"})
+
+
+class ESIMAccessError(Exception):
+    """
+    Запрос к API не выполнен: таймаут, ошибка соединения или HTTP,
+    некорректный ответ или отключение выключателем
+
+    Отличается от ответа API с success=false, после которого методы
+    клиента возвращают пустой результат.
+    """
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Является ли ошибка признаком недоступности API
+
+    Таймауты, обрывы соединения, ответы 5xx и 429 считаются временными:
+    такие запросы можно повторить, и они учитываются выключателем.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500 or error.status == 429
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+def describe_error(error: BaseException) -> str:
+    """Короткое описание ошибки запроса для логов"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"HTTP {error.status}"
+    if isinstance(error, asyncio.TimeoutError):
+        return "таймаут"
+    return f"{type(error).__name__}: {error}"
+
+
+def error_type(error: BaseException) -> str:
+    """Тип ошибки для метрик: timeout, connection, http_<код> или имя исключения"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"http_{error.status}"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, aiohttp.ClientConnectionError):
+        return "connection"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    return type(error).__name__
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Задержка перед повтором с экспоненциальным ростом и случайным разбросом
+
+    Разброс от нуля до base * 2^attempt (не больше cap), чтобы повторы
+    многих запросов после сбоя не приходили в API одновременно.
+
+    :param attempt: Номер неудачной попытки (с нуля)
+    :param base: Базовая задержка (в секундах)
+    :param cap: Максимальная задержка (в секундах)
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
 
 class ESIMAccessClient:
     """
-    Класс для работы с API eSIM Access
+    Асинхронный клиент для работы с API eSIM Access
+
+    Использует одну долгоживущую aiohttp-сессию с пулом keep-alive соединений,
+    поэтому запросы к API не блокируют event loop бота.
+
+    У каждого эндпоинта свой таймаут. Запросы только на чтение
+    (IDEMPOTENT_PATHS) при временных ошибках повторяются с задержкой
+    backoff_delay. Пока API недоступен, выключатель (self.breaker)
+    сразу отклоняет запросы, не дожидаясь таймаутов.
     """
 
-    def __init__(self, access_code: str):
+    def __init__(
+        self,
+        access_code: str,
+        timeout: float = 15.0,
+        max_concurrency: int = 20,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+        retries: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 5.0,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
         """
         Инициализация клиента API eSIM Access
 
         :param access_code: Access Code для API eSIM Access
+        :param timeout: Таймаут запроса к эндпоинту без своего таймаута (в секундах)
+        :param max_concurrency: Максимальное число одновременных запросов к API
+        :param endpoint_timeouts: Таймауты по эндпоинтам (по умолчанию DEFAULT_ENDPOINT_TIMEOUTS)
+        :param retries: Число повторов идемпотентного запроса после временной ошибки
+        :param retry_base_delay: Базовая задержка перед повтором (в секундах)
+        :param retry_max_delay: Максимальная задержка перед повтором (в секундах)
+        :param breaker: Выключатель запросов (по умолчанию с настройками CircuitBreaker)
+        :param metrics: Набор метрик, в котором регистрируются метрики клиента
         """
         self.base_url = "https://api.esimaccess.com/api/v1/open"
         self.headers = {
             "RT-AccessCode": access_code,
             "Content-Type": "application/json"
         }
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.endpoint_timeouts = dict(DEFAULT_ENDPOINT_TIMEOUTS if endpoint_timeouts is None else endpoint_timeouts)
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker = breaker if breaker is not None else CircuitBreaker(name="eSIM Access")
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Одновременные одинаковые запросы объединяются в один
+        self.single_flight = SingleFlight()
+
+        # Счетчики по эндпоинтам
+        self.requests: Counter = Counter()
+        self.retried: Counter = Counter()
+        self.failed: Counter = Counter()
+
+        self._register_metrics(metrics if metrics is not None else MetricsRegistry())
+
+    def _register_metrics(self, metrics: MetricsRegistry) -> None:
+        """Создает метрики запросов к API"""
+        self.metrics = metrics
+        # Время ответа API без ожидания свободного слота - задержка на стороне провайдера и сети
+        self._latency = metrics.histogram(
+            "esim_api_request_duration_seconds",
+            "Время выполнения HTTP-запроса к eSIM Access",
+            ("endpoint", "outcome")
+        )
+        # Ожидание слота и разбор JSON - задержка на стороне бота
+        self._queue_wait = metrics.histogram(
+            "esim_api_queue_wait_seconds",
+            "Ожидание свободного слота перед запросом к eSIM Access",
+            ("endpoint",)
+        )
+        self._parse_time = metrics.histogram(
+            "esim_api_parse_duration_seconds",
+            "Разбор ответа eSIM Access",
+            ("endpoint",)
+        )
+        self._errors = metrics.counter(
+            "esim_api_errors_total",
+            "Ошибки запросов к eSIM Access по типу",
+            ("endpoint", "type")
+        )
+        self._retries = metrics.counter(
+            "esim_api_retries_total",
+            "Повторы запросов к eSIM Access",
+            ("endpoint",)
+        )
+        self._request_bytes = metrics.counter(
+            "esim_api_request_bytes_total",
+            "Отправлено байт в eSIM Access",
+            ("endpoint",)
+        )
+        self._response_bytes = metrics.counter(
+            "esim_api_response_bytes_total",
+            "Получено байт от eSIM Access",
+            ("endpoint",)
+        )
+        self._in_flight = metrics.gauge(
+            "esim_api_in_flight_requests",
+            "Выполняющиеся запросы к eSIM Access",
+            ("endpoint",)
+        )
+        breaker_state = metrics.gauge(
+            "esim_api_circuit_state",
+            "Состояние выключателя запросов к eSIM Access (1 - текущее)",
+            ("state",)
+        )
+
+        def collect_breaker_state() -> None:
+            state = self.breaker.state
+            for name in (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN):
+                breaker_state.labels(name).set(1 if name == state else 0)
+
+        metrics.on_collect(collect_breaker_state)
 
-    def get_packages_by_country(self, country_code: str) -> List[Dict[str, Any]]:
+    @property
+    def available(self) -> bool:
+        """Считается ли API доступным (выключатель замкнут)"""
+        return self.breaker.is_closed
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики запросов, повторов и состояние выключателя"""
+        return {
+            "requests": dict(self.requests),
+            "retried": dict(self.retried),
+            "failed": dict(self.failed),
+            "breaker": self.breaker.stats(),
+            "single_flight": self.single_flight.stats()
+        }
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Возвращает общую сессию, создавая её при первом обращении
+
+        Сессия создается лениво, так как ей нужен запущенный event loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Закрывает сессию и пул соединений"""
+        logger.info(f"Статистика запросов к eSIM Access: {self.stats()}")
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Выполняет POST-запрос к API
+
+        Идемпотентные запросы повторяются при временных ошибках.
+
+        :param path: Путь эндпоинта относительно base_url
+        :param payload: Тело запроса
+        :param timeout: Таймаут запроса (по умолчанию таймаут эндпоинта)
+        :return: Разобранный JSON-ответ
+        :raises ESIMAccessError: Если запрос не выполнен (после всех повторов)
+        """
+        timeout = timeout or self.endpoint_timeouts.get(path, self.timeout)
+        attempts = 1 + (self.retries if path in IDEMPOTENT_PATHS else 0)
+        data = json_codec.dumps(payload)
+
+        for attempt in range(attempts):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError as error:
+                # Недоступность API уже записана в лог выключателем
+                self._errors.labels(path, "circuit_open").inc()
+                raise ESIMAccessError(str(error)) from error
+
+            self.requests[path] += 1
+            try:
+                body = await self._send(path, data, timeout)
+            except Exception as error:
+                self._errors.labels(path, error_type(error)).inc()
+                transient = is_transient_error(error)
+                if transient:
+                    self.breaker.record_failure()
+                else:
+                    # API ответил (например, 4xx) - на доступность это не влияет
+                    self.breaker.record_success()
+
+                if not transient or attempt + 1 >= attempts:
+                    self.failed[path] += 1
+                    logger.error(f"Ошибка запроса {path}: {describe_error(error)}")
+                    raise ESIMAccessError(f"{path}: {describe_error(error)}") from error
+
+                self.retried[path] += 1
+                self._retries.labels(path).inc()
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                logger.warning(f"{path}: {describe_error(error)}, повтор {attempt + 1}/{self.retries} через {delay:.2f} с")
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Отмена запроса ничего не говорит о доступности API
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                break
+
+        started = time.perf_counter()
+        # Разбор в потоке не помогает: json и orjson держат GIL все время разбора
+        try:
+            result = json_codec.loads(body)
+        except ValueError as error:
+            self._errors.labels(path, "invalid_json").inc()
+            logger.error(f"Некорректный ответ {path}: {error}")
+            raise ESIMAccessError(f"{path}: некорректный ответ") from error
+        self._parse_time.labels(path).observe(time.perf_counter() - started)
+
+        if isinstance(result, dict) and not result.get("success"):
+            # HTTP 200, но API отклонил запрос (success=false)
+            self._errors.labels(path, "api_error").inc()
+        return result
+
+    async def _send(self, path: str, data: bytes, timeout: float) -> bytes:
+        """Одна попытка POST-запроса, возвращает тело ответа"""
+        session = await self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            started = time.perf_counter()
+            self._queue_wait.labels(path).observe(started - queued_at)
+            self._request_bytes.labels(path).inc(len(data))
+
+            in_flight = self._in_flight.labels(path)
+            in_flight.inc()
+            outcome = "error"
+            try:
+                async with session.post(f"{self.base_url}/{path}", data=data, timeout=client_timeout) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+                outcome = "ok"
+            finally:
+                in_flight.dec()
+                self._latency.labels(path, outcome).observe(time.perf_counter() - started)
+
+        self._response_bytes.labels(path).inc(len(body))
+        return body
+
+    async def get_packages_by_country(self, country_code: str) -> List[Dict[str, Any]]:
         """
         Получение тарифов для конкретной страны
 
+        Одновременные запросы для одной страны выполняются одним вызовом API.
+
         :param country_code: Код страны (ISO)
-        :return: Список доступных пакетов
+        :return: Список доступных пакетов (пустой, если API ответил ошибкой)
+        :raises ESIMAccessError: Если API недоступен
         """
-        endpoint = f"{self.base_url}/package/list"
+        return await self.single_flight.do(
+            ("package/list", country_code),
+            lambda: self._fetch_packages(country_code)
+        )
+
+    async def _fetch_packages(self, country_code: str) -> List[Dict[str, Any]]:
+        """Запрос тарифов для страны к API"""
         payload = {
             "locationCode": country_code,
             "type": "",
@@ -43,34 +375,24 @@ class ESIMAccessClient:
             "iccid": ""
         }
 
-        try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                data=json.dumps(payload)
-            )
-            response.raise_for_status()
-            result = response.json()
+        result = await self._post("package/list", payload)
 
-            if result.get("success"):
-                return result.get("obj", {}).get("packageList", [])
-            else:
-                logger.error(f"Ошибка API: {result.get('errorMsg')}")
-                return []
-        except Exception as e:
-            logger.error(f"Ошибка запроса: {e}")
+        if result.get("success"):
+            return result.get("obj", {}).get("packageList", [])
+        else:
+            logger.error(f"Ошибка API: {result.get('errorMsg')}")
             return []
 
-    def order_profile(self, package_code: str, price: float, count: int = 1) -> Optional[str]:
+    async def order_profile(self, package_code: str, price: float, count: int = 1) -> Optional[str]:
         """
         Заказ eSIM профиля
 
         :param package_code: Код пакета
         :param price: Цена пакета
         :param count: Количество
-        :return: Номер заказа или None в случае ошибки
+        :return: Номер заказа или None, если API отклонил заказ
+        :raises ESIMAccessError: Если API недоступен (заказ мог быть не создан)
         """
-        endpoint = f"{self.base_url}/esim/order"
         transaction_id = f"WWS-{uuid.uuid4().hex[:8]}"
         amount = price * count
 
@@ -86,32 +408,59 @@ class ESIMAccessClient:
             ]
         }
 
-        try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                data=json.dumps(payload)
-            )
-            response.raise_for_status()
-            result = response.json()
+        result = await self._post("esim/order", payload)
 
-            if result.get("success"):
-                return result.get("obj", {}).get("orderNo")
-            else:
-                logger.error(f"Ошибка заказа: {result.get('errorMsg')}")
-                return None
-        except Exception as e:
-            logger.error(f"Ошибка запроса: {e}")
+        if result.get("success"):
+            return result.get("obj", {}).get("orderNo")
+        else:
+            logger.error(f"Ошибка заказа: {result.get('errorMsg')}")
             return None
 
-    def query_order(self, order_no: str) -> List[Dict[str, Any]]:
+    async def query_order(self, order_no: str) -> List[Dict[str, Any]]:
         """
         Запрос информации о заказе
 
+        Одновременные запросы одного заказа выполняются одним вызовом API.
+
         :param order_no: Номер заказа
         :return: Список eSIM профилей в заказе
+        :raises ESIMAccessError: Если API недоступен
         """
-        endpoint = f"{self.base_url}/esim/query"
+        return await self.single_flight.do(
+            ("esim/query", order_no),
+            lambda: self._query_order(order_no)
+        )
+
+    async def query_orders(
+        self,
+        order_nos: List[str],
+        concurrency: int = 5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Запрос информации о нескольких заказах параллельно
+
+        API не поддерживает запрос нескольких заказов одним вызовом,
+        поэтому заказы запрашиваются одновременно с ограничением параллельности.
+
+        :param order_nos: Номера заказов
+        :param concurrency: Максимальное число одновременных запросов
+        :return: Списки eSIM профилей по номеру заказа (без заказов, запрос которых не выполнен)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def query_one(order_no: str) -> Optional[List[Dict[str, Any]]]:
+            async with semaphore:
+                try:
+                    return await self.query_order(order_no)
+                except ESIMAccessError:
+                    return None
+
+        unique = list(dict.fromkeys(order_nos))
+        results = await asyncio.gather(*(query_one(order_no) for order_no in unique))
+        return {order_no: profiles for order_no, profiles in zip(unique, results) if profiles is not None}
+
+    async def _query_order(self, order_no: str) -> List[Dict[str, Any]]:
+        """Запрос информации о заказе к API"""
         payload = {
             "orderNo": order_no,
             "iccid": "",
@@ -121,20 +470,10 @@ class ESIMAccessClient:
             }
         }
 
-        try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                data=json.dumps(payload)
-            )
-            response.raise_for_status()
-            result = response.json()
+        result = await self._post("esim/query", payload)
 
-            if result.get("success"):
-                return result.get("obj", {}).get("esimList", [])
-            else:
-                logger.error(f"Ошибка запроса заказа: {result.get('errorMsg')}")
-                return []
-        except Exception as e:
-            logger.error(f"Ошибка запроса: {e}")
-            return []
\ No newline at end of file
+        if result.get("success"):
+            return result.get("obj", {}).get("esimList", [])
+        else:
+            logger.error(f"Ошибка запроса заказа: {result.get('errorMsg')}")
+            return []
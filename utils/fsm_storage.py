@@ -0,0 +1,207 @@
+# utils/fsm_storage.py
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+
+class FSMRecord:
+    """
+    Состояние и данные FSM одного пользователя
+    """
+
+    __slots__ = ("state", "data")
+
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None):
+        self.state = state
+        self.data = data if data is not None else {}
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище состояний FSM в SQLite
+
+    Состояния хранятся в памяти и читаются из базы только при первом
+    обращении к ключу. Изменения помечают ключ как измененный и
+    записываются в базу фоновой задачей раз в flush_interval: несколько
+    update_data подряд для одного пользователя дают одну запись на диск.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.5,
+        key_builder: Optional[KeyBuilder] = None
+    ):
+        """
+        Инициализация хранилища FSM
+
+        :param path: Путь к файлу базы SQLite
+        :param flush_interval: Интервал записи изменений на диск (в секундах)
+        :param key_builder: Построитель ключей (по умолчанию DefaultKeyBuilder)
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+        self._records: Dict[str, FSMRecord] = {}
+        self._dirty: Set[str] = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-storage")
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение и создает схему (выполняется в потоке базы)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет функцию в потоке базы"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _get_record(self, key: StorageKey) -> Tuple[str, FSMRecord]:
+        """Возвращает запись из памяти, при первом обращении читает её из базы"""
+        db_key = self.key_builder.build(key)
+        record = self._records.get(db_key)
+
+        if record is None:
+            def read() -> Optional[Tuple[Optional[str], str]]:
+                return self._connect().execute(
+                    "SELECT state, data FROM fsm WHERE key = ?",
+                    (db_key,)
+                ).fetchone()
+
+            row = await self._run(read)
+            # Пока шло чтение, запись могла появиться в памяти
+            record = self._records.get(db_key)
+            if record is None:
+                record = FSMRecord(row[0], json.loads(row[1])) if row else FSMRecord()
+                self._records[db_key] = record
+
+        return db_key, record
+
+    def _mark_dirty(self, db_key: str) -> None:
+        """Помечает ключ для записи и планирует сброс на диск"""
+        self._dirty.add(db_key)
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Записывает изменения после flush_interval"""
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Записывает все измененные ключи одной транзакцией"""
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, set()
+        upserts = []
+        deletes = []
+
+        for db_key in dirty:
+            record = self._records.get(db_key)
+            if record is None or (record.state is None and not record.data):
+                # Пустые записи не храним ни на диске, ни в памяти
+                self._records.pop(db_key, None)
+                deletes.append((db_key,))
+            else:
+                upserts.append((db_key, record.state, json.dumps(record.data, ensure_ascii=False)))
+
+        def write() -> None:
+            conn = self._connect()
+            with conn:
+                if deletes:
+                    conn.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+                if upserts:
+                    conn.executemany(
+                        "INSERT INTO fsm (key, state, data) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data",
+                        upserts
+                    )
+
+        try:
+            await self._run(write)
+        except Exception as e:
+            logger.error(f"Ошибка записи состояний FSM: {e}")
+            # Повторим запись при следующем сбросе
+            self._dirty.update(dirty)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        db_key, record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(db_key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._get_record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        db_key, record = await self._get_record(key)
+        record.data = data.copy()
+        self._mark_dirty(db_key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._get_record(key)
+        return record.data.copy()
+
+    async def get_value(
+        self, storage_key: StorageKey, dict_key: str, default: Optional[Any] = None
+    ) -> Optional[Any]:
+        _, record = await self._get_record(storage_key)
+        return copy(record.data.get(dict_key, default))
+
+    async def close(self) -> None:
+        """Записывает изменения и закрывает базу"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+        def close_conn() -> None:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        await self._run(close_conn)
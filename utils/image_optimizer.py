@@ -0,0 +1,133 @@
+# utils/image_optimizer.py
+
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow не установлен - картинки отправляются как есть
+    Image = None
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Telegram показывает фото не больше 1280 пикселей по большей стороне
+TELEGRAM_PHOTO_MAX_SIDE = 1280
+
+
+def _file_hash(path: str) -> str:
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def optimize_image(
+    source_path: str,
+    cache_dir: str,
+    max_side: int = TELEGRAM_PHOTO_MAX_SIDE,
+    quality: int = 82
+) -> Optional[str]:
+    """
+    Создает уменьшенную и пережатую копию картинки для отправки в Telegram
+
+    Копия кэшируется на диске по хэшу исходного файла и параметрам
+    сжатия, поэтому повторный запуск не пережимает картинку заново.
+
+    :param source_path: Путь к исходной картинке
+    :param cache_dir: Каталог для оптимизированных копий
+    :param max_side: Максимальный размер большей стороны (в пикселях)
+    :param quality: Качество JPEG (1-95)
+    :return: Путь к оптимизированной копии или None, если Pillow недоступен
+    """
+    if Image is None:
+        return None
+
+    source_hash = _file_hash(source_path)[:16]
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    target_path = os.path.join(cache_dir, f"{name}-{source_hash}-{max_side}q{quality}.jpg")
+
+    if os.path.exists(target_path):
+        return target_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with Image.open(source_path) as image:
+        image = image.convert("RGB")
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        tmp_path = f"{target_path}.tmp"
+        image.save(tmp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(tmp_path, target_path)
+
+    return target_path
+
+
+def optimize_region_images(
+    regions: Dict[str, Dict[str, Any]],
+    cache_dir: str,
+    max_side: int = TELEGRAM_PHOTO_MAX_SIDE,
+    quality: int = 82
+) -> Dict[str, int]:
+    """
+    Оптимизирует картинки регионов и подменяет пути в REGIONS
+
+    Если оптимизированная копия получилась не меньше исходника или
+    Pillow недоступен, в REGIONS остается исходный файл.
+
+    :param regions: Словарь регионов (config.REGIONS)
+    :param cache_dir: Каталог для оптимизированных копий
+    :param max_side: Максимальный размер большей стороны (в пикселях)
+    :param quality: Качество JPEG (1-95)
+    :return: Сэкономленные байты по ключу региона
+    """
+    if Image is None:
+        logger.warning("Pillow не установлен, картинки регионов не оптимизируются")
+        return {}
+
+    saved = {}
+
+    for region_key, region_data in regions.items():
+        # Исходный путь сохраняем, чтобы повторный вызов не пережимал копию
+        source_path = region_data.setdefault("source_image", region_data["image"])
+
+        try:
+            target_path = optimize_image(source_path, cache_dir, max_side, quality)
+        except Exception as e:
+            logger.error(f"Ошибка оптимизации картинки {source_path}: {e}")
+            continue
+
+        if target_path is None:
+            continue
+
+        source_size = os.path.getsize(source_path)
+        target_size = os.path.getsize(target_path)
+
+        if target_size >= source_size:
+            region_data["image"] = source_path
+            saved[region_key] = 0
+            continue
+
+        region_data["image"] = target_path
+        saved[region_key] = source_size - target_size
+        logger.info(
+            f"Картинка {source_path}: {source_size // 1024} КБ -> {target_size // 1024} КБ "
+            f"(сэкономлено {saved[region_key] // 1024} КБ)"
+        )
+
+    total = sum(saved.values())
+    logger.info(f"Картинки регионов оптимизированы, всего сэкономлено {total // 1024} КБ")
+
+    return saved
+
+
+if __name__ == "__main__":
+    # Предварительная сборка оптимизированных картинок: python -m utils.image_optimizer
+    from config import REGIONS, IMAGE_CACHE_DIR
+
+    logging.basicConfig(level=logging.INFO)
+    optimize_region_images(REGIONS, IMAGE_CACHE_DIR)
@@ -0,0 +1,31 @@
+# utils/json_codec.py
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен - используется стандартный json
+    orjson = None
+
+
+if orjson is not None:
+    CODEC_NAME = "orjson"
+
+    def dumps(obj: Any) -> bytes:
+        """Сериализует объект в JSON (UTF-8)"""
+        return orjson.dumps(obj)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Разбирает JSON из bytes или str"""
+        return orjson.loads(data)
+else:
+    CODEC_NAME = "json"
+
+    def dumps(obj: Any) -> bytes:
+        """Сериализует объект в JSON (UTF-8)"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Разбирает JSON из bytes или str"""
+        return json.loads(data)
@@ -0,0 +1,261 @@
+# utils/metrics.py
+
+import logging
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы задержек по умолчанию (в секундах)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки для текстового формата Prometheus"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """
+    Метрика с метками
+
+    Значения для каждого набора меток хранятся отдельно, набор меток
+    передается позиционно: errors.labels("esim/query", "timeout").inc().
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Значение метрики для набора меток (создается при первом обращении)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидались метки {self.labelnames}, получено {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, values: Tuple[str, ...], child) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Строки метрики в текстовом формате Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            for name, labels, value in self._samples(values, child):
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self, values, child):
+        yield self.name, _format_labels(self.labelnames, values), child.value
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и уменьшаться"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self, values, child):
+        yield self.name, _format_labels(self.labelnames, values), child.value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Последняя корзина - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам (задержки, размеры)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _samples(self, values, child):
+        names = self.labelnames + ("le",)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            yield f"{self.name}_bucket", _format_labels(names, values + (_format_value(bound),)), cumulative
+        labels = _format_labels(self.labelnames, values)
+        yield f"{self.name}_sum", labels, child.sum
+        yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """
+    Набор метрик приложения
+
+    Метрики создаются через counter, gauge и histogram. Значения, которые
+    удобнее считать в момент запроса (состояние выключателя и т.п.),
+    обновляются функциями из on_collect перед выдачей.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """Добавляет функцию, обновляющую метрики перед выдачей"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        for collector in self._collectors:
+            collector()
+
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Локальный HTTP-сервер с метриками в формате Prometheus
+
+    Работает отдельно от вебхука, чтобы метрики не были доступны
+    снаружи вместе с публичным адресом бота.
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9100, path: str = "/metrics"):
+        """
+        Инициализация сервера метрик
+
+        :param registry: Набор метрик
+        :param host: Адрес для прослушивания
+        :param port: Порт для прослушивания
+        :param path: Путь, по которому отдаются метрики
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Отдает текущие значения метрик"""
+        return web.Response(body=self.registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> None:
+        """Запускает сервер метрик"""
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get(self.path, self.handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host=self.host, port=self.port).start()
+        except OSError as e:
+            # Без метрик бот продолжает работать
+            logger.error(f"Не удалось запустить сервер метрик на {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+
+        self._runner = runner
+        logger.info(f"Метрики доступны на http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        """Останавливает сервер метрик"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,266 @@
+# utils/order_store.py
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    order_no TEXT NOT NULL UNIQUE,
+    country TEXT NOT NULL,
+    package_name TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_user ON orders (user_id, id);
+CREATE TABLE IF NOT EXISTS pending_provisioning (
+    order_no TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    chat_id INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class OrderStore:
+    """
+    Хранилище заказов пользователей в SQLite
+
+    Все обращения к базе выполняются в отдельном потоке, чтобы не блокировать
+    event loop. База работает в режиме WAL, а записи группируются: заказы,
+    пришедшие в течение batch_delay, сохраняются одним коммитом.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, batch_delay: float = 0.05):
+        """
+        Инициализация хранилища заказов
+
+        :param path: Путь к файлу базы SQLite
+        :param batch_size: Максимальное число записей в одном коммите
+        :param batch_delay: Время накопления записей перед коммитом (в секундах)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+
+        self._conn: Optional[sqlite3.Connection] = None
+        # Один поток: соединение SQLite используется строго последовательно
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="order-store")
+        self._pending: List[Tuple[tuple, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение и создает схему (выполняется в потоке базы)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет функцию в потоке базы"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _row_to_order(row: sqlite3.Row) -> Dict[str, Any]:
+        """Преобразует строку таблицы в словарь заказа"""
+        return {
+            'id': row['id'],
+            'order_no': row['order_no'],
+            'country': row['country'],
+            'package_name': row['package_name'],
+            'date': datetime.fromtimestamp(row['created_at']).strftime('%d.%m.%Y')
+        }
+
+    async def add_order(self, user_id: int, order_no: str, country: str, package_name: str) -> None:
+        """
+        Сохраняет заказ пользователя
+
+        Возвращает управление после коммита пакета, в который попал заказ.
+
+        :param user_id: ID пользователя Telegram
+        :param order_no: Номер заказа eSIM Access
+        :param country: Название страны
+        :param package_name: Название тарифа
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(((user_id, order_no, country, package_name, int(time.time())), future))
+
+        if len(self._pending) >= self.batch_size:
+            await self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+        await future
+
+    async def _flush_later(self) -> None:
+        """Коммитит накопленные записи после batch_delay"""
+        try:
+            await asyncio.sleep(self.batch_delay)
+        finally:
+            self._flush_task = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        """Записывает все накопленные заказы одним коммитом"""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+
+        def write() -> None:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO orders (user_id, order_no, country, package_name, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [row for row, _ in batch]
+                )
+
+        try:
+            await self._run(write)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения заказов: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    async def get_user_orders_page(
+        self,
+        user_id: int,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 5
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Получение страницы заказов пользователя, новые заказы первыми
+
+        Страницы читаются по ключу (id), а не через OFFSET, поэтому стоимость
+        запроса не зависит от номера страницы и длины истории.
+
+        :param user_id: ID пользователя Telegram
+        :param before_id: Вернуть заказы старше этого ID (следующая страница)
+        :param after_id: Вернуть заказы новее этого ID (предыдущая страница)
+        :param limit: Размер страницы
+        :return: Заказы страницы и признак наличия еще заказов в том же направлении
+        """
+        def read() -> Tuple[List[Dict[str, Any]], bool]:
+            conn = self._connect()
+            if after_id is not None:
+                rows = conn.execute(
+                    "SELECT * FROM orders WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    (user_id, after_id, limit + 1)
+                ).fetchall()
+                has_more = len(rows) > limit
+                rows = list(reversed(rows[:limit]))
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM orders WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                    (user_id, before_id if before_id is not None else 2 ** 63 - 1, limit + 1)
+                ).fetchall()
+                has_more = len(rows) > limit
+                rows = rows[:limit]
+            return [self._row_to_order(row) for row in rows], has_more
+
+        return await self._run(read)
+
+    async def get_order(self, user_id: int, order_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получение заказа пользователя по его ID в хранилище
+
+        :param user_id: ID пользователя Telegram
+        :param order_id: ID заказа в хранилище
+        :return: Заказ или None, если он не найден
+        """
+        def read() -> Optional[Dict[str, Any]]:
+            row = self._connect().execute(
+                "SELECT * FROM orders WHERE id = ? AND user_id = ?",
+                (order_id, user_id)
+            ).fetchone()
+            return self._row_to_order(row) if row is not None else None
+
+        return await self._run(read)
+
+    async def add_pending_provisioning(self, order_no: str, user_id: int, chat_id: int, created_at: float) -> None:
+        """
+        Сохраняет оплаченный заказ, для которого еще ожидается выпуск eSIM
+
+        :param order_no: Номер заказа eSIM Access
+        :param user_id: ID пользователя Telegram
+        :param chat_id: ID чата для отправки данных eSIM
+        :param created_at: Время оплаты (unix time)
+        """
+        def write() -> None:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO pending_provisioning (order_no, user_id, chat_id, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (order_no, user_id, chat_id, created_at)
+                )
+
+        await self._run(write)
+
+    async def remove_pending_provisioning(self, order_no: str) -> None:
+        """
+        Удаляет заказ из ожидающих выпуска eSIM
+
+        :param order_no: Номер заказа eSIM Access
+        """
+        def write() -> None:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM pending_provisioning WHERE order_no = ?", (order_no,))
+
+        await self._run(write)
+
+    async def get_pending_provisioning(self) -> List[Dict[str, Any]]:
+        """
+        Все заказы, ожидающие выпуска eSIM
+
+        :return: Словари с order_no, user_id, chat_id и created_at (unix time)
+        """
+        def read() -> List[Dict[str, Any]]:
+            rows = self._connect().execute(
+                "SELECT order_no, user_id, chat_id, created_at FROM pending_provisioning ORDER BY created_at"
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+        return await self._run(read)
+
+    async def close(self) -> None:
+        """Сохраняет накопленные записи и закрывает базу"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._flush()
+
+        def close_conn() -> None:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        await self._run(close_conn)
@@ -0,0 +1,241 @@
+# utils/package_search.py
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.catalog_cache import CatalogCache
+from utils.country_index import normalize
+from utils.packages import GB, MB, PackageTable, PackageView, duration_in_days
+
+# "10 ГБ", "500mb", "30 дней", "2 недели", "$15", "до 20$"
+_VOLUME = re.compile(r"(\d+(?:[.,]\d+)?)\s*(гб|gb|г|g|мб|mb)\b")
+_DURATION = re.compile(r"(\d+)\s*(дн\w*|день|д|days?|d|нед\w*|weeks?|w|мес\w*|months?|m)\b")
+_PRICE = re.compile(r"\$\s*(\d+(?:[.,]\d+)?)|(\d+(?:[.,]\d+)?)\s*(?:\$|usd|долл\w*)")
+
+
+class SearchQuery:
+    """
+    Параметры поиска тарифов
+
+    Объем задается в байтах, срок - в днях, цена - в единицах API
+    (1/10000 доллара). None означает "без ограничения".
+    """
+
+    __slots__ = ("region", "min_volume", "min_days", "max_price")
+
+    def __init__(
+        self,
+        region: Optional[str] = None,
+        min_volume: Optional[int] = None,
+        min_days: Optional[int] = None,
+        max_price: Optional[int] = None
+    ):
+        self.region = region
+        self.min_volume = min_volume
+        self.min_days = min_days
+        self.max_price = max_price
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in (self.region, self.min_volume, self.min_days, self.max_price))
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchQuery(region={self.region!r}, min_volume={self.min_volume}, "
+            f"min_days={self.min_days}, max_price={self.max_price})"
+        )
+
+
+def parse_search_query(text: str, regions: Dict[str, dict]) -> SearchQuery:
+    """
+    Разбирает запрос вида "Европа 10 ГБ 30 дней до 20$"
+
+    :param text: Текст запроса
+    :param regions: Структура регионов из config.REGIONS
+    :return: Параметры поиска
+    """
+    query = SearchQuery()
+    text = text.casefold().replace("ё", "е")
+
+    match = _VOLUME.search(text)
+    if match:
+        value = float(match.group(1).replace(",", "."))
+        query.min_volume = int(value * (MB if match.group(2) in ("мб", "mb") else GB))
+
+    match = _DURATION.search(text)
+    if match:
+        value, unit = int(match.group(1)), match.group(2)
+        if unit.startswith(("нед", "week", "w")):
+            value *= 7
+        elif unit.startswith(("мес", "month", "m")):
+            value *= 30
+        query.min_days = value
+
+    match = _PRICE.search(text)
+    if match:
+        value = float((match.group(1) or match.group(2)).replace(",", "."))
+        query.max_price = int(value * 10000)
+
+    words = f" {normalize(text)} "
+    for region_key, region in regions.items():
+        if f" {normalize(region['name'])} " in words:
+            query.region = region_key
+            break
+
+    return query
+
+
+class PackageSearch:
+    """
+    Поиск тарифов по всем странам в кэше каталога
+
+    Индекс строится по всем таблицам CatalogCache и перестраивается только
+    при изменении кэша. Для объема, срока и цены хранятся номера строк,
+    отсортированные по значению поля, поэтому диапазон по каждому полю
+    находится бинарным поиском. Обращений к API поиск не делает: в выдачу
+    попадают только страны, каталог которых уже загружен.
+    """
+
+    def __init__(self, cache: CatalogCache, regions: Dict[str, dict], country_codes: Dict[str, str]):
+        """
+        Инициализация поиска
+
+        :param cache: Кэш каталога тарифов
+        :param regions: Структура регионов из config.REGIONS
+        :param country_codes: Название страны -> ISO-код
+        """
+        self.cache = cache
+        self.region_countries: Dict[str, frozenset] = {
+            region_key: frozenset(
+                country_codes[country] for country in region["countries"] if country in country_codes
+            )
+            for region_key, region in regions.items()
+        }
+
+        self._generation = -1
+        self._countries: List[str] = []
+        self._tables: List[PackageTable] = []
+        self._rows = array("l")
+        self._volumes = array("q")
+        self._days = array("l")
+        self._prices = array("q")
+        self._sorted: Dict[str, Tuple[List[int], List[int]]] = {}
+
+    def __len__(self) -> int:
+        self._ensure_index()
+        return len(self._rows)
+
+    def _ensure_index(self) -> None:
+        """Перестраивает индекс, если кэш каталога изменился"""
+        if self._generation == self.cache.generation:
+            return
+
+        countries, tables = [], []
+        rows, volumes, days, prices = array("l"), array("q"), array("l"), array("q")
+
+        for country_code, table in self.cache.items():
+            for index in range(len(table)):
+                countries.append(country_code)
+                tables.append(table)
+                rows.append(index)
+                volumes.append(table.volumes[index])
+                days.append(duration_in_days(table.durations[index], table.duration_units[index]))
+                prices.append(table.prices[index])
+
+        self._countries, self._tables = countries, tables
+        self._rows, self._volumes, self._days, self._prices = rows, volumes, days, prices
+
+        # По каждому полю: номера строк по возрастанию значения и сами значения для bisect
+        # Порядок по цене сразу учитывает порядок выдачи: при равной цене больше объем и срок
+        self._sorted = {}
+        for field, values in (("volume", volumes), ("days", days), ("price", prices)):
+            if field == "price":
+                order = sorted(range(len(values)), key=lambda row: (prices[row], -volumes[row], -days[row]))
+            else:
+                order = sorted(range(len(values)), key=values.__getitem__)
+            self._sorted[field] = (order, [values[row] for row in order])
+
+        self._generation = self.cache.generation
+
+    def _range(self, field: str, low: Optional[int], high: Optional[int]) -> List[int]:
+        """Номера строк, у которых значение поля в [low, high]"""
+        order, keys = self._sorted[field]
+        start = bisect_left(keys, low) if low is not None else 0
+        end = bisect_right(keys, high) if high is not None else len(keys)
+        return order[start:end]
+
+    def search(
+        self,
+        region: Optional[str] = None,
+        countries: Optional[Iterable[str]] = None,
+        min_volume: Optional[int] = None,
+        max_volume: Optional[int] = None,
+        min_days: Optional[int] = None,
+        max_days: Optional[int] = None,
+        max_price: Optional[int] = None,
+        limit: int = 10
+    ) -> List[Tuple[str, PackageView]]:
+        """
+        Поиск тарифов по фильтрам
+
+        Результат отсортирован по цене, при равной цене выше тарифы
+        с большим объемом и сроком.
+
+        :param region: Ключ региона из REGIONS
+        :param countries: Коды стран (ISO)
+        :param min_volume: Минимальный объем данных (в байтах)
+        :param max_volume: Максимальный объем данных (в байтах)
+        :param min_days: Минимальный срок действия (в днях)
+        :param max_days: Максимальный срок действия (в днях)
+        :param max_price: Максимальная цена (в единицах API)
+        :param limit: Максимальное число результатов
+        :return: Пары (код страны, тариф)
+        """
+        self._ensure_index()
+
+        allowed: Optional[frozenset] = None
+        if region is not None:
+            allowed = self.region_countries.get(region, frozenset())
+        if countries is not None:
+            allowed = frozenset(countries) if allowed is None else allowed & frozenset(countries)
+
+        # Самый узкий диапазон по полям становится списком кандидатов
+        # Без фильтров по объему и сроку строки перебираются по возрастанию цены
+        ranges = {"price": self._range("price", None, max_price)}
+        if min_volume is not None or max_volume is not None:
+            ranges["volume"] = self._range("volume", min_volume, max_volume)
+        if min_days is not None or max_days is not None:
+            ranges["days"] = self._range("days", min_days, max_days)
+
+        driver = min(ranges, key=lambda field: len(ranges[field]))
+        candidates = ranges[driver]
+        by_price = driver == "price"
+
+        volumes, days, prices, country_codes = self._volumes, self._days, self._prices, self._countries
+        low_volume = min_volume if min_volume is not None else -1
+        high_volume = max_volume if max_volume is not None else float("inf")
+        low_days = min_days if min_days is not None else -1
+        high_days = max_days if max_days is not None else float("inf")
+        high_price = max_price if max_price is not None else float("inf")
+
+        matches = (
+            row for row in candidates
+            if (allowed is None or country_codes[row] in allowed)
+            and low_volume <= volumes[row] <= high_volume
+            and low_days <= days[row] <= high_days
+            and prices[row] <= high_price
+        )
+
+        if by_price:
+            # Кандидаты уже упорядочены в порядке выдачи - достаточно первых limit совпадений
+            rows = []
+            for row in matches:
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
+        else:
+            rows = heapq.nsmallest(limit, matches, key=lambda row: (prices[row], -volumes[row], -days[row]))
+
+        return [(country_codes[row], PackageView(self._tables[row], self._rows[row])) for row in rows]
@@ -0,0 +1,272 @@
+# utils/packages.py
+
+import sys
+from array import array
+from sys import intern
+from typing import Any, Dict, Iterator, List, Optional
+
+GB = 1073741824
+MB = 1048576
+
+
+def format_volume(volume_bytes: int) -> str:
+    """Объем данных в МБ или ГБ"""
+    if volume_bytes >= GB:  # 1 ГБ
+        return f"{volume_bytes / GB:.1f} ГБ"
+    return f"{volume_bytes / MB:.0f} МБ"
+
+
+def format_duration(duration: int, duration_unit: str) -> str:
+    """Срок действия тарифа"""
+    if duration_unit == "DAY":
+        return f"{duration} дней"
+    if duration_unit == "MONTH":
+        return f"{duration} месяцев"
+    return f"{duration} {duration_unit}"
+
+
+def duration_in_days(duration: int, duration_unit: str) -> int:
+    """Срок действия в днях (для сортировки и поиска)"""
+    if duration_unit == "MONTH":
+        return duration * 30
+    return duration
+
+
+class PackageTable:
+    """
+    Каталог тарифов одной страны в колоночном виде
+
+    Числовые поля хранятся в типизированных массивах, строки интернируются,
+    поэтому одинаковые подписи ("1.0 ГБ", "7 дней") хранятся в памяти
+    один раз. Подписи для кнопок и экрана подтверждения вычисляются один раз
+    при разборе ответа API. Из ответа API сохраняются только нужные боту поля.
+    """
+
+    __slots__ = (
+        "codes",
+        "names",
+        "duration_units",
+        "volume_texts",
+        "duration_texts",
+        "button_texts",
+        "volumes",
+        "durations",
+        "prices",
+        "_by_code",
+    )
+
+    def __init__(self):
+        self.codes: List[str] = []
+        self.names: List[str] = []
+        self.duration_units: List[str] = []
+        self.volume_texts: List[str] = []
+        self.duration_texts: List[str] = []
+        self.button_texts: List[str] = []
+        self.volumes = array("q")
+        self.durations = array("l")
+        self.prices = array("q")
+        self._by_code: Dict[str, int] = {}
+
+    @classmethod
+    def from_api(cls, packages: List[Dict[str, Any]]) -> "PackageTable":
+        """
+        Создает таблицу из packageList ответа API
+
+        :param packages: Список пакетов из API
+        :return: Колоночная таблица тарифов
+        """
+        table = cls()
+        for package in packages:
+            table.append(
+                code=package.get("packageCode", ""),
+                name=package.get("name", "Неизвестный тариф"),
+                volume=package.get("volume", 0),
+                duration=package.get("duration", 0),
+                duration_unit=package.get("durationUnit", "DAY"),
+                price=package.get("price", 0)
+            )
+        return table
+
+    def append(
+        self,
+        code: str,
+        name: str,
+        volume: int,
+        duration: int,
+        duration_unit: str,
+        price: int
+    ) -> None:
+        """
+        Добавляет тариф в таблицу
+
+        :param code: packageCode
+        :param name: Название тарифа
+        :param volume: Объем данных (в байтах)
+        :param duration: Срок действия
+        :param duration_unit: Единица срока действия (DAY, MONTH)
+        :param price: Цена в единицах API (1/10000 доллара)
+        """
+        volume_text = intern(format_volume(volume))
+        duration_text = intern(format_duration(duration, duration_unit))
+
+        self._by_code[intern(code)] = len(self.codes)
+        self.codes.append(intern(code))
+        self.names.append(intern(name))
+        self.duration_units.append(intern(duration_unit))
+        self.volume_texts.append(volume_text)
+        self.duration_texts.append(duration_text)
+        self.button_texts.append(f"{name} ({volume_text}, {duration_text}) - ${price / 10000:.2f}")
+        self.volumes.append(volume)
+        self.durations.append(duration)
+        self.prices.append(price)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> "PackageView":
+        if index < 0:
+            index += len(self.codes)
+        if not 0 <= index < len(self.codes):
+            raise IndexError("package index out of range")
+        return PackageView(self, index)
+
+    def __iter__(self) -> Iterator["PackageView"]:
+        for index in range(len(self.codes)):
+            yield PackageView(self, index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackageTable):
+            return NotImplemented
+        return (
+            self.codes == other.codes
+            and self.names == other.names
+            and self.duration_units == other.duration_units
+            and self.volumes == other.volumes
+            and self.durations == other.durations
+            and self.prices == other.prices
+        )
+
+    def find(self, package_code: str) -> Optional["PackageView"]:
+        """Поиск тарифа по packageCode"""
+        index = self._by_code.get(package_code)
+        return PackageView(self, index) if index is not None else None
+
+
+class PackageView:
+    """
+    Тариф из каталога - ссылка на строку PackageTable
+
+    Не хранит собственных данных: все поля читаются из колонок таблицы,
+    где подписи уже вычислены при получении каталога.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: PackageTable, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def code(self) -> str:
+        return self.table.codes[self.index]
+
+    @property
+    def name(self) -> str:
+        return self.table.names[self.index]
+
+    @property
+    def volume(self) -> int:
+        return self.table.volumes[self.index]
+
+    @property
+    def duration(self) -> int:
+        return self.table.durations[self.index]
+
+    @property
+    def duration_unit(self) -> str:
+        return self.table.duration_units[self.index]
+
+    @property
+    def price(self) -> int:
+        return self.table.prices[self.index]
+
+    @property
+    def price_usd(self) -> float:
+        return self.table.prices[self.index] / 10000  # Преобразование в доллары
+
+    @property
+    def volume_text(self) -> str:
+        return self.table.volume_texts[self.index]
+
+    @property
+    def duration_text(self) -> str:
+        return self.table.duration_texts[self.index]
+
+    @property
+    def button_text(self) -> str:
+        return self.table.button_texts[self.index]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackageView):
+            return NotImplemented
+        return self.table is other.table and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+    def __repr__(self) -> str:
+        return f"PackageView({self.code!r}, {self.button_text!r})"
+
+
+def parse_packages(packages: List[Dict[str, Any]]) -> PackageTable:
+    """
+    Преобразует packageList ответа API в колоночную таблицу тарифов
+
+    :param packages: Список пакетов из API
+    :return: Таблица тарифов с готовыми подписями для отображения
+    """
+    return PackageTable.from_api(packages)
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    Приблизительный размер объекта в памяти вместе с вложенными объектами
+
+    :param obj: Объект
+    :return: Размер в байтах
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(
+            deep_sizeof(getattr(obj, slot), seen)
+            for slot in obj.__slots__
+            if hasattr(obj, slot)
+        )
+
+    return size
+
+
+def memory_report(catalog: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Сравнивает память каталога в виде словарей API и в виде PackageTable
+
+    :param catalog: packageList по коду страны
+    :return: Число тарифов и размеры обоих представлений в байтах
+    """
+    tables = {code: parse_packages(packages) for code, packages in catalog.items()}
+    return {
+        "packages": sum(len(packages) for packages in catalog.values()),
+        "raw_bytes": deep_sizeof(catalog),
+        "table_bytes": deep_sizeof(tables)
+    }
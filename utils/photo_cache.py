@@ -0,0 +1,111 @@
+# utils/photo_cache.py
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Tuple, Union
+
+from aiogram.types import FSInputFile, Message
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class PhotoCache:
+    """
+    Кэш file_id картинок, уже загруженных в Telegram
+
+    После первой отправки файла Telegram возвращает file_id, по которому
+    картинку можно отправлять повторно без загрузки. Ключ кэша - путь к
+    файлу и хэш его содержимого, поэтому замена картинки сбрасывает запись.
+    Кэш сохраняется на диск и переживает перезапуск бота.
+    """
+
+    def __init__(self, path: str):
+        """
+        Инициализация кэша file_id
+
+        :param path: Путь к JSON-файлу для хранения кэша
+        """
+        self.path = path
+        self._file_ids: Dict[str, str] = {}
+        # Хэши файлов по пути, пересчитываются только при изменении файла
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}
+
+        self._load()
+
+    def _load(self) -> None:
+        """Загружает кэш с диска"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._file_ids = json.load(f)
+        except FileNotFoundError:
+            self._file_ids = {}
+        except Exception as e:
+            logger.error(f"Ошибка чтения кэша картинок: {e}")
+            self._file_ids = {}
+
+    def _save(self) -> None:
+        """Сохраняет кэш на диск"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._file_ids, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения кэша картинок: {e}")
+
+    def _key(self, file_path: str) -> str:
+        """Ключ кэша: путь к файлу и хэш его содержимого"""
+        stat = os.stat(file_path)
+        cached = self._hashes.get(file_path)
+
+        if cached is None or cached[0] != stat.st_mtime or cached[1] != stat.st_size:
+            with open(file_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            cached = (stat.st_mtime, stat.st_size, digest)
+            self._hashes[file_path] = cached
+
+        return f"{file_path}:{cached[2]}"
+
+    def get(self, file_path: str) -> Union[str, FSInputFile]:
+        """
+        Возвращает file_id картинки или файл для загрузки
+
+        :param file_path: Путь к картинке
+        :return: file_id, если картинка уже загружена, иначе FSInputFile
+        """
+        file_id = self._file_ids.get(self._key(file_path))
+        return file_id if file_id else FSInputFile(file_path)
+
+    def remember(self, file_path: str, message: Union[Message, bool, None]) -> None:
+        """
+        Запоминает file_id из отправленного сообщения с фото
+
+        :param file_path: Путь к отправленной картинке
+        :param message: Результат send_photo/edit_media
+        """
+        if not isinstance(message, Message) or not message.photo:
+            return
+
+        # Последний элемент - картинка в максимальном размере
+        file_id = message.photo[-1].file_id
+        key = self._key(file_path)
+
+        if self._file_ids.get(key) != file_id:
+            self._file_ids[key] = file_id
+            self._save()
+
+    def forget(self, file_path: str) -> None:
+        """
+        Удаляет file_id картинки, например если Telegram его не принял
+
+        :param file_path: Путь к картинке
+        """
+        if self._file_ids.pop(self._key(file_path), None) is not None:
+            self._save()
@@ -0,0 +1,272 @@
+# utils/provisioning.py
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiogram import Bot
+
+from utils.esim_client import ESIMAccessClient
+from utils.order_store import OrderStore
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+ReadyHandler = Callable[[Bot, "PendingOrder", Dict[str, Any]], Awaitable[None]]
+ExpiredHandler = Callable[[Bot, "PendingOrder"], Awaitable[None]]
+
+
+class PendingOrder:
+    """
+    Заказ, для которого ожидается выпуск eSIM
+    """
+
+    __slots__ = ("order_no", "user_id", "chat_id", "created_at", "next_poll_at", "delay", "attempts")
+
+    def __init__(self, order_no: str, user_id: int, chat_id: int, delay: float, age: float = 0):
+        now = time.monotonic()
+        self.order_no = order_no
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.created_at = now - age
+        self.next_poll_at = now + delay
+        self.delay = delay
+        self.attempts = 0
+
+
+def is_profile_ready(profile: Dict[str, Any]) -> bool:
+    """Выпущена ли eSIM: есть код активации или QR-код"""
+    return bool(profile.get("ac") or profile.get("qrCodeUrl"))
+
+
+class ProvisioningPoller:
+    """
+    Фоновое ожидание выпуска eSIM для оплаченных заказов
+
+    Все ожидающие заказы опрашиваются одним циклом: на каждом шаге
+    запрашиваются только заказы, у которых подошло время проверки,
+    а интервал между проверками заказа растет экспоненциально. Как только
+    eSIM готова, вызывается обработчик, который отправляет данные пользователю.
+
+    Если задано хранилище, ожидающие заказы сохраняются в нем и при
+    запуске загружаются снова, поэтому перезапуск бота во время выпуска
+    eSIM не теряет отправку данных пользователю.
+    """
+
+    def __init__(
+        self,
+        client: ESIMAccessClient,
+        initial_delay: float = 2,
+        max_delay: float = 60,
+        max_age: float = 1800,
+        store: Optional[OrderStore] = None
+    ):
+        """
+        Инициализация опроса заказов
+
+        :param client: Клиент API eSIM Access
+        :param initial_delay: Первая задержка перед проверкой заказа (в секундах)
+        :param max_delay: Максимальный интервал между проверками (в секундах)
+        :param max_age: Время, после которого заказ перестает опрашиваться (в секундах)
+        :param store: Хранилище для ожидающих заказов (None - только в памяти)
+        """
+        self.client = client
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.max_age = max_age
+        self.store = store
+
+        self._pending: Dict[str, PendingOrder] = {}
+        self._handler: Optional[ReadyHandler] = None
+        self._expired_handler: Optional[ExpiredHandler] = None
+        self._bot: Optional[Bot] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Незавершенные записи в хранилище
+        self._writes: Set[asyncio.Task] = set()
+
+    def on_ready(self, handler: ReadyHandler) -> ReadyHandler:
+        """
+        Регистрирует обработчик готовой eSIM (можно использовать как декоратор)
+
+        :param handler: Корутина (bot, pending_order, profile)
+        :return: Тот же обработчик
+        """
+        self._handler = handler
+        return handler
+
+    def on_expired(self, handler: ExpiredHandler) -> ExpiredHandler:
+        """
+        Регистрирует обработчик заказа, для которого eSIM не выпущена за max_age
+
+        :param handler: Корутина (bot, pending_order)
+        :return: Тот же обработчик
+        """
+        self._expired_handler = handler
+        return handler
+
+    def register(self, order_no: str, user_id: int, chat_id: int) -> None:
+        """
+        Добавляет заказ в очередь ожидания
+
+        :param order_no: Номер заказа
+        :param user_id: ID пользователя Telegram
+        :param chat_id: ID чата для отправки данных eSIM
+        """
+        if order_no in self._pending:
+            return
+
+        self._pending[order_no] = PendingOrder(order_no, user_id, chat_id, self.initial_delay)
+        self._wakeup.set()
+
+        if self.store is not None:
+            self._write(
+                self.store.add_pending_provisioning(order_no, user_id, chat_id, time.time()),
+                f"Не удалось сохранить ожидающий заказ {order_no}"
+            )
+
+    def _write(self, coro: Awaitable[None], error_text: str) -> None:
+        """Выполняет запись в хранилище в фоне, ошибки только записываются в лог"""
+        async def run() -> None:
+            try:
+                await coro
+            except Exception as e:
+                logger.error(f"{error_text}: {e}")
+
+        task = asyncio.create_task(run())
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def _forget(self, order_no: str) -> None:
+        """Убирает заказ из ожидающих в памяти и в хранилище"""
+        self._pending.pop(order_no, None)
+        if self.store is not None:
+            self._write(
+                self.store.remove_pending_provisioning(order_no),
+                f"Не удалось удалить ожидающий заказ {order_no}"
+            )
+
+    async def load(self) -> int:
+        """
+        Загружает ожидающие заказы из хранилища
+
+        :return: Число загруженных заказов
+        """
+        if self.store is None:
+            return 0
+
+        try:
+            rows = await self.store.get_pending_provisioning()
+        except Exception as e:
+            logger.error(f"Не удалось загрузить ожидающие заказы: {e}")
+            return 0
+
+        now = time.time()
+        for row in rows:
+            if row["order_no"] not in self._pending:
+                age = max(0.0, now - row["created_at"])
+                self._pending[row["order_no"]] = PendingOrder(
+                    row["order_no"], row["user_id"], row["chat_id"], self.initial_delay, age=age
+                )
+
+        if rows:
+            logger.info(f"Загружено ожидающих выпуска eSIM заказов: {len(rows)}")
+            self._wakeup.set()
+        return len(rows)
+
+    def is_pending(self, order_no: str) -> bool:
+        """Ожидается ли еще выпуск eSIM для заказа"""
+        return order_no in self._pending
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def start(self, bot: Bot) -> None:
+        """Запускает фоновый опрос"""
+        self._bot = bot
+        if self._task is None or self._task.done():
+            await self.load()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновый опрос"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Дожидаемся записей, чтобы хранилище закрывалось уже после них
+        if self._writes:
+            await asyncio.gather(*self._writes)
+
+    async def _run(self) -> None:
+        """Основной цикл опроса"""
+        while True:
+            now = time.monotonic()
+            due = [order for order in self._pending.values() if order.next_poll_at <= now]
+
+            if due:
+                await asyncio.gather(*(self._poll(order) for order in due))
+                continue
+
+            # Спим до ближайшей проверки или до регистрации нового заказа
+            timeout = None
+            if self._pending:
+                timeout = min(order.next_poll_at for order in self._pending.values()) - now
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, order: PendingOrder) -> None:
+        """Проверяет один заказ и планирует следующую проверку"""
+        order.attempts += 1
+
+        try:
+            profiles: List[Dict[str, Any]] = await self.client.query_order(order.order_no)
+        except Exception as e:
+            logger.error(f"Ошибка опроса заказа {order.order_no}: {e}")
+            profiles = []
+
+        if profiles and is_profile_ready(profiles[0]):
+            self._forget(order.order_no)
+            await self._deliver(order, profiles[0])
+            return
+
+        now = time.monotonic()
+        if now - order.created_at >= self.max_age:
+            self._forget(order.order_no)
+            logger.warning(
+                f"eSIM для заказа {order.order_no} не выпущена за {self.max_age:.0f} с, опрос остановлен"
+            )
+            await self._expire(order)
+            return
+
+        order.delay = min(order.delay * 2, self.max_delay)
+        order.next_poll_at = now + order.delay
+
+    async def _expire(self, order: PendingOrder) -> None:
+        """Передает обработчику заказ, опрос которого остановлен"""
+        if self._expired_handler is None or self._bot is None:
+            return
+
+        try:
+            await self._expired_handler(self._bot, order)
+        except Exception as e:
+            logger.error(f"Ошибка обработки просроченного заказа {order.order_no}: {e}")
+
+    async def _deliver(self, order: PendingOrder, profile: Dict[str, Any]) -> None:
+        """Передает готовую eSIM обработчику"""
+        if self._handler is None or self._bot is None:
+            return
+
+        try:
+            await self._handler(self._bot, order, profile)
+        except Exception as e:
+            logger.error(f"Ошибка отправки eSIM по заказу {order.order_no}: {e}")
@@ -0,0 +1,57 @@
+# utils/single_flight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов
+
+    Пока запрос с данным ключом выполняется, остальные вызовы с тем же
+    ключом не создают новый запрос, а ждут результат уже идущего.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+        # Счетчики
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет func один раз для всех одновременных вызовов с ключом key
+
+        :param key: Ключ запроса
+        :param func: Функция без аргументов, возвращающая корутину
+        :return: Результат func
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        # shield: отмена одного ожидающего не отменяет запрос для остальных
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Удаляет завершенный запрос из списка выполняющихся"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики объединения запросов"""
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,164 @@
+# utils/status_cache.py
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.esim_client import ESIMAccessClient, ESIMAccessError
+
+# Поля профиля, которые не меняются после выпуска eSIM
+STATIC_FIELDS = ("iccid", "ac", "qrCodeUrl")
+
+
+class StatusEntry:
+    """
+    Запись кэша: профили eSIM заказа и время получения статуса
+    """
+
+    __slots__ = ("profiles", "status_at")
+
+    def __init__(self, profiles: List[Dict[str, Any]], status_at: float):
+        self.profiles = profiles
+        self.status_at = status_at
+
+
+class ESIMStatusCache:
+    """
+    Кэш профилей eSIM по номеру заказа
+
+    Неизменяемые поля (ICCID, код активации, QR-код) хранятся бессрочно,
+    а статус считается актуальным только ttl секунд. Заказы, для которых
+    eSIM еще не выпущена, не кэшируются. При смене состояния заказа
+    запись нужно сбросить через invalidate() или обновить через put().
+    """
+
+    def __init__(self, client: ESIMAccessClient, ttl: float = 60, max_size: int = 10000):
+        """
+        Инициализация кэша профилей eSIM
+
+        :param client: Клиент API eSIM Access
+        :param ttl: Время актуальности статуса (в секундах)
+        :param max_size: Максимальное число заказов в кэше
+        """
+        self.client = client
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries: "OrderedDict[str, StatusEntry]" = OrderedDict()
+
+        # Счетчики
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, order_no: str) -> Optional[StatusEntry]:
+        """Возвращает запись, если её статус еще актуален"""
+        entry = self._entries.get(order_no)
+        if entry is not None and time.monotonic() - entry.status_at < self.ttl:
+            self._entries.move_to_end(order_no)
+            return entry
+        return None
+
+    def put(self, order_no: str, profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Сохраняет свежие профили заказа
+
+        Если в новом ответе нет неизменяемых полей, они берутся из кэша.
+
+        :param order_no: Номер заказа
+        :param profiles: Профили eSIM из API
+        :return: Профили, сохраненные в кэше
+        """
+        if not profiles or not (profiles[0].get("ac") or profiles[0].get("qrCodeUrl")):
+            # eSIM еще не выпущена - такой ответ не кэшируем
+            return profiles
+
+        old = self._entries.get(order_no)
+        if old is not None:
+            for new_profile, old_profile in zip(profiles, old.profiles):
+                for field in STATIC_FIELDS:
+                    if not new_profile.get(field) and old_profile.get(field):
+                        new_profile[field] = old_profile[field]
+
+        self._entries[order_no] = StatusEntry(profiles, time.monotonic())
+        self._entries.move_to_end(order_no)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        return profiles
+
+    def invalidate(self, order_no: str) -> None:
+        """
+        Сбрасывает статус заказа, неизменяемые поля при этом сохраняются
+
+        :param order_no: Номер заказа
+        """
+        entry = self._entries.get(order_no)
+        if entry is not None:
+            entry.status_at = float("-inf")
+
+    async def get(self, order_no: str) -> List[Dict[str, Any]]:
+        """
+        Получение профилей eSIM заказа через кэш
+
+        Если API недоступен, возвращаются последние известные данные.
+
+        :param order_no: Номер заказа
+        :return: Список eSIM профилей в заказе
+        """
+        entry = self._fresh(order_no)
+        if entry is not None:
+            self.hits += 1
+            return entry.profiles
+
+        self.misses += 1
+        try:
+            profiles = await self.client.query_order(order_no)
+        except ESIMAccessError:
+            profiles = []
+        if profiles:
+            return self.put(order_no, profiles)
+
+        stale = self._entries.get(order_no)
+        return stale.profiles if stale is not None else profiles
+
+    async def get_many(self, order_nos: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Получение профилей нескольких заказов через кэш
+
+        Заказы без актуального статуса запрашиваются параллельно.
+
+        :param order_nos: Номера заказов
+        :return: Списки eSIM профилей по номеру заказа
+        """
+        result = {}
+        missing = []
+
+        for order_no in order_nos:
+            entry = self._fresh(order_no)
+            if entry is not None:
+                self.hits += 1
+                result[order_no] = entry.profiles
+            else:
+                self.misses += 1
+                missing.append(order_no)
+
+        if missing:
+            fetched = await self.client.query_orders(missing)
+            for order_no in missing:
+                profiles = fetched.get(order_no, [])
+                if profiles:
+                    result[order_no] = self.put(order_no, profiles)
+                else:
+                    stale = self._entries.get(order_no)
+                    result[order_no] = stale.profiles if stale is not None else profiles
+
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики кэша"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
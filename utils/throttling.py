@@ -0,0 +1,197 @@
+# utils/throttling.py
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from utils.callback_router import CallbackRouter
+
+# Имя флага aiogram со стоимостью обработчика: @flags.throttling_cost(5)
+COST_FLAG = "throttling_cost"
+
+
+class TokenBucket:
+    """
+    Корзина токенов: пополняется со скоростью rate в секунду до burst
+    """
+
+    __slots__ = ("tokens", "updated_at", "notified")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated_at = now
+        # Сообщили ли пользователю об ограничении с момента последнего успеха
+        self.notified = False
+
+    def consume(self, cost: float, rate: float, burst: float, now: float) -> bool:
+        """
+        Списывает cost токенов, если их хватает
+
+        :return: True, если запрос укладывается в лимит
+        """
+        if now > self.updated_at:
+            self.tokens = min(burst, self.tokens + (now - self.updated_at) * rate)
+            self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты запросов по пользователю и по боту в целом
+
+    Подключается как inner middleware для message и callback_query,
+    то есть после выбора обработчика, но до его вызова. Каждый
+    обработчик стоит cost токенов: по умолчанию default_cost, либо
+    значение флага @flags.throttling_cost(...). Запрос проходит, только
+    если токенов хватает и в корзине пользователя, и в общей корзине.
+    Емкость корзины пользователя должна быть в несколько раз больше самой
+    большой стоимости, иначе дорогой шаг требует полностью полной корзины.
+
+    Ограниченный callback сразу получает callback.answer с подсказкой,
+    обработчик не вызывается. На сообщения подсказка отправляется один
+    раз до следующего успешного запроса пользователя. Корзины хранятся
+    в памяти в порядке последнего обращения, корзины неактивных
+    пользователей удаляются через idle_ttl.
+    """
+
+    def __init__(
+        self,
+        user_rate: float = 1.0,
+        user_burst: float = 15,
+        global_rate: float = 100,
+        global_burst: float = 200,
+        default_cost: float = 1,
+        idle_ttl: float = 600,
+        notice: str = "Слишком много запросов, попробуйте через пару секунд"
+    ):
+        """
+        Инициализация ограничителя
+
+        :param user_rate: Токенов в секунду на пользователя
+        :param user_burst: Емкость корзины пользователя
+        :param global_rate: Токенов в секунду на весь бот
+        :param global_burst: Емкость общей корзины
+        :param default_cost: Стоимость обработчика без флага throttling_cost
+        :param idle_ttl: Через сколько секунд без запросов корзина пользователя удаляется
+        :param notice: Текст для ограниченного пользователя
+        """
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.default_cost = default_cost
+        self.idle_ttl = max(idle_ttl, user_burst / user_rate)
+        self.notice = notice
+
+        self._users: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._global = TokenBucket(global_burst, time.monotonic())
+
+        # Счетчики
+        self.allowed = 0
+        self.throttled_user = 0
+        self.throttled_global = 0
+        self.expired = 0
+
+    def handler_cost(self, event: TelegramObject, data: Dict[str, Any]) -> float:
+        """Стоимость обработчика, выбранного для события"""
+        handler = data.get("handler")
+        if handler is None:
+            return self.default_cost
+
+        # Все callback-запросы обрабатывает CallbackRouter - берем флаги маршрута
+        router = getattr(handler.callback, "__self__", None)
+        if isinstance(router, CallbackRouter) and isinstance(event, CallbackQuery):
+            route, _ = router.match(event.data or "", data.get("raw_state"))
+            if route is None:
+                # Роутер пропустит событие (SkipHandler), и его оплатит обработчик,
+                # до которого оно дойдет, например stale_callback
+                return 0
+            flags = route.flags
+        else:
+            flags = handler.flags
+
+        return flags.get(COST_FLAG, self.default_cost)
+
+    def _expire(self, now: float) -> None:
+        """Удаляет корзины пользователей, не обращавшихся дольше idle_ttl"""
+        users = self._users
+        while users:
+            user_id, bucket = next(iter(users.items()))
+            if now - bucket.updated_at < self.idle_ttl:
+                break
+            del users[user_id]
+            self.expired += 1
+
+    def check(self, user_id: int, cost: float, now: Optional[float] = None) -> Optional[TokenBucket]:
+        """
+        Проверяет лимиты и списывает токены
+
+        :param user_id: ID пользователя Telegram
+        :param cost: Стоимость запроса
+        :return: None, если запрос разрешен, иначе корзина пользователя
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            bucket = self._users[user_id] = TokenBucket(self.user_burst, now)
+        else:
+            self._users.move_to_end(user_id)
+
+        # Дороже емкости корзины запрос быть не может, иначе он не пройдет никогда
+        user_cost = min(cost, self.user_burst)
+        if not bucket.consume(user_cost, self.user_rate, self.user_burst, now):
+            self.throttled_user += 1
+            return bucket
+
+        if not self._global.consume(min(cost, self.global_burst), self.global_rate, self.global_burst, now):
+            # Возвращаем пользователю списанные токены: ограничил общий лимит
+            bucket.tokens += user_cost
+            self.throttled_global += 1
+            return bucket
+
+        bucket.notified = False
+        self.allowed += 1
+        return None
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        cost = self.handler_cost(event, data)
+        if cost <= 0:
+            return await handler(event, data)
+
+        bucket = self.check(user.id, cost)
+        if bucket is None:
+            return await handler(event, data)
+
+        if isinstance(event, CallbackQuery):
+            await event.answer(self.notice)
+        elif isinstance(event, Message) and not bucket.notified:
+            bucket.notified = True
+            await event.answer(self.notice)
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики ограничителя"""
+        return {
+            "users": len(self._users),
+            "allowed": self.allowed,
+            "throttled_user": self.throttled_user,
+            "throttled_global": self.throttled_global,
+            "expired": self.expired
+        }
@@ -0,0 +1,138 @@
+# utils/webhook.py
+
+import asyncio
+import logging
+from typing import Any, Dict
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука с ограничением числа обновлений в обработке
+
+    Обновление принимается в обработку только при наличии свободного слота.
+    Пока слотов нет, запрос Telegram остается открытым, и Telegram сам
+    притормаживает отправку новых обновлений.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_in_flight: int = 100, **kwargs: Any):
+        """
+        Инициализация обработчика вебхука
+
+        :param dispatcher: Диспетчер aiogram
+        :param bot: Экземпляр бота
+        :param max_in_flight: Максимальное число обновлений в обработке
+        """
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @property
+    def in_flight(self) -> int:
+        """Число обновлений в обработке"""
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        await self._slots.acquire()
+        try:
+            return await super()._handle_request_background(bot=bot, request=request)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot=bot, update=update)
+        finally:
+            self._slots.release()
+
+
+async def setup_webhook(
+    bot: Bot,
+    dp: Dispatcher,
+    url: str,
+    secret_token: str,
+    max_connections: int = 40
+) -> bool:
+    """
+    Регистрирует вебхук в Telegram
+
+    :param bot: Экземпляр бота
+    :param dp: Диспетчер aiogram
+    :param url: Публичный URL вебхука
+    :param secret_token: Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+    :param max_connections: Максимальное число одновременных соединений от Telegram
+    :return: True, если вебхук установлен
+    """
+    if not secret_token:
+        logger.error("Вебхук без секрета не устанавливается: обновления можно было бы подделать")
+        return False
+
+    try:
+        await bot.set_webhook(
+            url=url,
+            secret_token=secret_token,
+            max_connections=max_connections,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Не удалось установить вебхук {url}: {e}")
+        return False
+
+
+async def run_webhook(
+    bot: Bot,
+    dp: Dispatcher,
+    host: str,
+    port: int,
+    path: str,
+    secret_token: str,
+    max_in_flight: int = 100
+) -> None:
+    """
+    Запускает aiohttp-сервер для приема обновлений через вебхук
+
+    :param bot: Экземпляр бота
+    :param dp: Диспетчер aiogram
+    :param host: Адрес для прослушивания
+    :param port: Порт для прослушивания
+    :param path: Путь вебхука
+    :param secret_token: Секрет для проверки запросов от Telegram
+    :param max_in_flight: Максимальное число обновлений в обработке
+    :raises ValueError: Если секрет не задан
+    """
+    if not secret_token:
+        raise ValueError("Вебхук без секрета не запускается: обновления можно было бы подделать")
+
+    app = web.Application()
+
+    handler = BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        max_in_flight=max_in_flight,
+        secret_token=secret_token
+    )
+    handler.register(app, path=path)
+
+    # Запуск startup/shutdown-обработчиков диспетчера вместе с приложением
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+
+    logger.info(f"Вебхук слушает {host}:{port}{path}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()